@@ -0,0 +1,166 @@
+import io
+import os
+import time
+import shutil
+import tempfile
+import asyncio
+import argparse
+import statistics
+import contextlib
+
+os.environ.setdefault('TELEGRAM_TOKEN', '123456:benchmark')
+os.environ.setdefault('ADMIN_CHAT_ID', '-1001')
+os.environ.setdefault('ADMIN_CHAT_REVIEWS_ID', '-1002')
+os.environ.setdefault('ADMIN_CHAT_PROPOSALS_ID', '-1003')
+os.environ.setdefault('REDIS_PORT', '6379')
+os.environ.setdefault('REDIS_DB', '0')
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
+
+import django
+
+django.setup()
+
+from aiogram import Bot
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.fsm.storage.memory import MemoryStorage
+from django.core.management import call_command
+from django.test.utils import setup_databases, teardown_databases
+
+import config
+from bot_session import BotAPISession, api_server
+from bot import create_dispatcher
+from middlewares.instrumentation import BotAPIMetricsMiddleware
+from work_exchange.celery import app as celery_app
+from benchmarks.fake_api import FakeBotAPI
+from benchmarks.journeys import (Replayer, install_query_counter, full_journey, cleanup_users, journey_user_ids,
+                                 translation_functions, fake_translate)
+
+
+def disable_translation():
+    for module, func in translation_functions():
+        setattr(module, func, fake_translate)
+
+
+def percentile(values, percent):
+    if len(values) < 2:
+        return values[0] if values else 0
+    return statistics.quantiles(values, n=100, method='inclusive')[percent - 1]
+
+
+def ms(value):
+    return f'{value * 1000:.1f}'
+
+
+def report_level(concurrency, replayer: Replayer, api: FakeBotAPI, elapsed):
+    samples = [sample for step in replayer.samples.values() for sample in step]
+    latencies = [latency for latency, _ in samples]
+    queries = [count for _, count in samples]
+    api_latencies = [latency for calls in api.calls.values() for latency in calls]
+
+    print(
+        f'{concurrency:>11} {len(samples):>8} {len(samples) / elapsed:>10.1f} '
+        f'{ms(percentile(latencies, 50)):>8} {ms(percentile(latencies, 95)):>8} {ms(percentile(latencies, 99)):>8} '
+        f'{statistics.mean(queries):>7.1f} {max(queries):>6} '
+        f'{len(api_latencies):>9} {ms(percentile(api_latencies, 50)):>8}'
+    )
+
+
+def report_steps(replayer: Replayer):
+    print()
+    print(f'{"step":<24} {"count":>6} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"q avg":>7} {"q max":>6}')
+    for step, samples in sorted(replayer.samples.items()):
+        latencies = [latency for latency, _ in samples]
+        queries = [count for _, count in samples]
+        print(
+            f'{step:<24} {len(samples):>6} {ms(percentile(latencies, 50)):>8} {ms(percentile(latencies, 95)):>8} '
+            f'{ms(percentile(latencies, 99)):>8} {statistics.mean(queries):>7.1f} {max(queries):>6}'
+        )
+
+
+def prepare():
+    """Создает отдельную тестовую БД (test_<имя БД>) и заполняет справочники; рабочая БД не затрагивается."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        databases = setup_databases(verbosity=0, interactive=False, aliases={'default'})
+        call_command('add_zones')
+        call_command('add_text')
+        call_command('add_buttons')
+
+    celery_app.conf.task_always_eager = True
+    disable_translation()
+    return databases
+
+
+def teardown(databases):
+    teardown_databases(databases, verbosity=0)
+
+
+async def run(args):
+    # в режиме --local-api файлы отдаются через общую папку, как у своего сервера telegram-bot-api
+    files_dir = tempfile.mkdtemp() if args.local_api else None
+    api = FakeBotAPI(port=args.port, latency=args.api_latency / 1000, files_dir=files_dir)
+    await api.start()
+
+    bot = Bot(
+        token=config.TELEGRAM_TOKEN,
+        session=BotAPISession(api=api_server(api.base_url) if files_dir else TelegramAPIServer.from_base(api.base_url)),
+    )
+    bot.session.middleware(BotAPIMetricsMiddleware())
+    dp = create_dispatcher(MemoryStorage())
+    replayer = Replayer(bot, dp)
+    await install_query_counter()
+
+    print(f'{"concurrency":>11} {"updates":>8} {"upd/s":>10} {"p50 ms":>8} {"p95 ms":>8} {"p99 ms":>8} {"q avg":>7} {"q max":>6} {"api calls":>9} {"api p50":>8}')
+
+    try:
+        for level_num, concurrency in enumerate(args.levels):
+            replayer.reset()
+            api.reset()
+
+            user_ids = []
+            journeys = []
+            for num in range(concurrency):
+                worker_user_id, employer_user_id = journey_user_ids(level_num * 10000 + num)
+                user_ids.extend([str(worker_user_id), str(employer_user_id)])
+                journeys.append(full_journey(replayer, worker_user_id, employer_user_id))
+
+            start = time.perf_counter()
+            await asyncio.gather(*journeys)
+            elapsed = time.perf_counter() - start
+
+            report_level(concurrency, replayer, api, elapsed)
+            if args.steps:
+                report_steps(replayer)
+
+            # рассылки по работникам/каналам спят между отправками, в замер они не входят
+            for task in asyncio.all_tasks():
+                if task is not asyncio.current_task():
+                    task.cancel()
+
+            if not args.keep_data:
+                await cleanup_users(user_ids)
+    finally:
+        await bot.session.close()
+        await api.stop()
+        if files_dir:
+            shutil.rmtree(files_dir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Нагрузочный прогон бота на локальной замене Bot API.')
+    parser.add_argument('--levels', default='1,5,10,25', type=lambda value: [int(level) for level in value.split(',')])
+    parser.add_argument('--api-latency', default=0, type=float, help='искусственная задержка ответа Bot API, мс')
+    parser.add_argument('--port', default=8081, type=int)
+    parser.add_argument('--local-api', action='store_true', help='отдавать файлы как свой сервер telegram-bot-api (--local)')
+    parser.add_argument('--steps', action='store_true', help='выводить статистику по каждому шагу сценария')
+    parser.add_argument('--keep-data', action='store_true', help='не удалять созданных пользователей')
+
+    args = parser.parse_args()
+    databases = prepare()
+    try:
+        asyncio.run(run(args))
+    finally:
+        teardown(databases)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+import io
+import os
+import time
+import json
+import asyncio
+import itertools
+from collections import defaultdict
+
+from aiohttp import web
+from aiogram import Bot
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import TelegramMethod
+from PIL import Image
+
+
+MESSAGE_METHODS = (
+    'sendMessage',
+    'sendPhoto',
+    'editMessageText',
+    'editMessageCaption',
+    'editMessageReplyMarkup',
+)
+
+
+class FakeBotAPI:
+    """Локальная замена Telegram Bot API: отвечает правдоподобными объектами и записывает время вызовов.
+
+    С files_dir ведет себя как свой сервер telegram-bot-api в режиме --local:
+    getFile кладет файл в files_dir и возвращает путь к нему вместо ссылки для скачивания.
+    """
+
+    def __init__(self, host='127.0.0.1', port=8081, latency=0.0, files_dir=None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.files_dir = files_dir
+        self.calls = defaultdict(list)
+        self._message_ids = itertools.count(1)
+        self._runner = None
+        self._photo = self._make_photo()
+
+    @property
+    def base_url(self):
+        return f'http://{self.host}:{self.port}'
+
+    @staticmethod
+    def _make_photo():
+        image = io.BytesIO()
+        Image.new('RGB', (640, 480), color=(200, 200, 200)).save(image, format='JPEG')
+        return image.getvalue()
+
+    def reset(self):
+        self.calls.clear()
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_route('*', '/bot{token}/{method}', self._handle_method)
+        app.router.add_get('/file/bot{token}/{path:.*}', self._handle_file)
+
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+
+    async def _handle_method(self, request: web.Request):
+        start = time.perf_counter()
+        method = request.match_info['method']
+        params = dict(await request.post())
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        response = web.json_response({'ok': True, 'result': self._result(method, params)})
+        self.calls[method].append(time.perf_counter() - start)
+        return response
+
+    async def _handle_file(self, request: web.Request):
+        start = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        response = web.Response(body=self._photo, content_type='image/jpeg')
+        self.calls['downloadFile'].append(time.perf_counter() - start)
+        return response
+
+    def _result(self, method, params):
+        if method in MESSAGE_METHODS:
+            return self._message(method, params)
+
+        if method == 'getFile':
+            file_id = params.get('file_id', 'file')
+            return {
+                'file_id': file_id,
+                'file_unique_id': file_id,
+                'file_size': len(self._photo),
+                'file_path': self._local_file(file_id) if self.files_dir else f'photos/{file_id}.jpg',
+            }
+
+        if method == 'getMe':
+            return {'id': 1, 'is_bot': True, 'first_name': 'bench', 'username': 'bench_bot'}
+
+        return True
+
+    def _local_file(self, file_id):
+        path = os.path.join(self.files_dir, 'photos', f'{file_id}.jpg')
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as file:
+                file.write(self._photo)
+
+        return path
+
+    def _message(self, method, params):
+        chat_id = str(params.get('chat_id', '0'))
+        if not chat_id.lstrip('-').isdigit():
+            chat_id = '0'
+
+        message = {
+            'message_id': int(params.get('message_id') or next(self._message_ids)),
+            'date': int(time.time()),
+            'chat': {'id': int(chat_id), 'type': 'private'},
+        }
+
+        if method == 'sendPhoto':
+            photo_id = params.get('photo') if isinstance(params.get('photo'), str) else 'photo'
+            message['photo'] = [{'file_id': photo_id, 'file_unique_id': photo_id, 'width': 640, 'height': 480}]
+            message['caption'] = params.get('caption')
+        else:
+            message['text'] = params.get('text', '')
+
+        if params.get('reply_markup'):
+            markup = json.loads(params['reply_markup'])
+            if 'inline_keyboard' in markup:
+                message['reply_markup'] = markup
+
+        return message
+
+
+class FakeSession(BaseSession):
+    """Сессия бота, которой отвечает FakeBotAPI в том же процессе, без сервера и сети (для тестов).
+
+    api, как у обычной сессии, - адрес Bot API; со своим сервером (api_server) файлы читаются с диска.
+    """
+
+    def __init__(self, fake_api: FakeBotAPI = None, **kwargs):
+        super().__init__(**kwargs)
+        self.fake_api = fake_api or FakeBotAPI()
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout=None):
+        start = time.perf_counter()
+        # параметры готовятся так же, как для формы настоящего запроса
+        params = {}
+        for key, value in method.model_dump(warnings=False).items():
+            value = self.prepare_value(value, bot=bot, files={})
+            if value:
+                params[key] = value
+
+        content = json.dumps({'ok': True, 'result': self.fake_api._result(method.__api_method__, params)})
+        response = self.check_response(bot=bot, method=method, status_code=200, content=content)
+        self.fake_api.calls[method.__api_method__].append(time.perf_counter() - start)
+        return response.result
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        self.fake_api.calls['downloadFile'].append(0)
+        yield self.fake_api._photo
+
+    async def close(self):
+        pass
@@ -0,0 +1,243 @@
+import sys
+import time
+import itertools
+import contextvars
+from collections import defaultdict
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from asgiref.sync import sync_to_async
+from django.db import connection
+
+from config import ADMIN_CHAT_ID
+from core.management.commands.seed_scale import synthetic_tg_id
+from core.models import TGUser, Worker, Employer, Job, WorkerCooperationProposal, WorkerReview
+from keyboards.callbacks import (
+    AdminControlsCallBackFactory,
+    TargetCallbackFactory,
+    ZoneCallbackFactory,
+    WorkTypeCallbackFactory,
+    WorkerNotificationCallbackFactory,
+    WorkerProfileConfirmationCallbackFactory,
+    WorkerControlsCallBackFactory,
+    WorkerMainSectionsCallBackFactory,
+    WorkerPagesSectionsCallBackFactory,
+    WorkerDetailsCallBackFactory,
+    EmployerControlsCallBackFactory,
+    EmployerMainSectionsCallBackFactory,
+    EmployerPagesSectionsCallBackFactory,
+    EmployerDetailsCallBackFactory,
+)
+
+
+current_queries = contextvars.ContextVar('current_queries', default=None)
+
+# пользователи сценариев получают tg_id вне диапазона реальных телеграм id (как у seed_scale),
+# с отдельным смещением, чтобы не пересекаться с синтетическими данными seed_scale
+JOURNEY_OFFSET = 10 ** 8
+
+
+def journey_user_ids(num):
+    """tg_id работника и работодателя для сценария номер num."""
+    return int(synthetic_tg_id(JOURNEY_OFFSET + num * 2)), int(synthetic_tg_id(JOURNEY_OFFSET + num * 2 + 1))
+
+
+async def fake_translate(text):
+    return text
+
+
+def translation_functions():
+    """Модули бота с функциями перевода: переводчик ходит в интернет, в прогонах текст возвращается как есть."""
+    for name, module in list(sys.modules.items()):
+        if name == 'utils' or name.startswith('handlers.'):
+            for func in ('translate_to_heb', 'translate_to_rus'):
+                if hasattr(module, func):
+                    yield module, func
+
+
+def count_queries(execute, sql, params, many, context):
+    queries = current_queries.get()
+    if queries is not None:
+        queries.append(sql)
+    return execute(sql, params, many, context)
+
+
+@sync_to_async
+def install_query_counter():
+    # запросы из sync_to_async выполняются в отдельном потоке со своим соединением
+    if count_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(count_queries)
+
+
+class Replayer:
+    """Прогоняет сценарии пользователей через диспетчер и собирает время обработки и число запросов к БД."""
+
+    def __init__(self, bot: Bot, dp: Dispatcher):
+        self.bot = bot
+        self.dp = dp
+        self.samples = defaultdict(list)
+        self._update_ids = itertools.count(1)
+        self._message_ids = itertools.count(1)
+
+    def reset(self):
+        self.samples.clear()
+
+    def build_update(self, payload):
+        return Update.model_validate(
+            {'update_id': next(self._update_ids), **payload},
+            context={'bot': self.bot},
+        )
+
+    async def feed(self, step, payload):
+        update = self.build_update(payload)
+
+        queries = []
+        token = current_queries.set(queries)
+        start = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        finally:
+            elapsed = time.perf_counter() - start
+            current_queries.reset(token)
+
+        self.samples[step].append((elapsed, len(queries)))
+
+    def _message(self, user_id, chat_id=None, **fields):
+        return {
+            'message_id': next(self._message_ids),
+            'date': int(time.time()),
+            'chat': {'id': chat_id or user_id, 'type': 'private'},
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}', 'username': f'user{user_id}'},
+            **fields,
+        }
+
+    async def text(self, step, user_id, text):
+        await self.feed(step, {'message': self._message(user_id, text=text)})
+
+    async def photo(self, step, user_id, file_id):
+        photo = [{'file_id': file_id, 'file_unique_id': file_id, 'width': 640, 'height': 480}]
+        await self.feed(step, {'message': self._message(user_id, photo=photo)})
+
+    async def callback(self, step, user_id, callback_data, chat_id=None):
+        await self.feed(step, {'callback_query': {
+            'id': str(next(self._update_ids)),
+            'from': {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'},
+            'chat_instance': str(user_id),
+            'message': self._message(user_id, chat_id=chat_id, text='-'),
+            'data': callback_data.pack(),
+        }})
+
+    async def admin(self, step, target, object_id):
+        await self.callback(
+            step,
+            1,
+            AdminControlsCallBackFactory(target=target, action='accept', object_id=object_id),
+            chat_id=int(ADMIN_CHAT_ID),
+        )
+
+
+async def employer_onboarding(replayer: Replayer, user_id):
+    await replayer.text('start', user_id, '/start')
+    await replayer.callback('choose_target', user_id, TargetCallbackFactory(target=2))
+    await replayer.text('employer_phone', user_id, f'+972{user_id}')
+    await replayer.text('employer_name', user_id, f'Company {user_id}')
+
+    await replayer.callback('employer_jobs_menu', user_id, EmployerMainSectionsCallBackFactory(destination='jobs'))
+    await replayer.callback('job_add', user_id, EmployerControlsCallBackFactory(control='jobs', action='add'))
+    for zone in ('1', '2', '2', '3'):
+        await replayer.callback('zone_toggle', user_id, ZoneCallbackFactory(zone=zone))
+    await replayer.callback('zones_confirm', user_id, ZoneCallbackFactory(zone='confirm'))
+    await replayer.text('job_salary', user_id, '50')
+    await replayer.text('job_description', user_id, 'Уход за пожилым человеком')
+    await replayer.callback('work_type', user_id, WorkTypeCallbackFactory(work_type='permanent'))
+    await replayer.callback('job_notifications', user_id, EmployerControlsCallBackFactory(control='notifications', action='yes'))
+    await replayer.callback('job_confirm', user_id, EmployerControlsCallBackFactory(control='job', action='confirm'))
+
+    job = await sync_to_async(Job.objects.filter(employer__tg_id=user_id).first)()
+    if job:
+        await replayer.admin('admin_job_approve', 'job', job.id)
+
+    return job
+
+
+async def worker_onboarding(replayer: Replayer, user_id):
+    await replayer.text('start', user_id, '/start')
+    await replayer.callback('choose_target', user_id, TargetCallbackFactory(target=1))
+    await replayer.text('worker_name', user_id, f'Worker {user_id}')
+    await replayer.text('worker_phone', user_id, f'+7900{user_id}')
+    await replayer.photo('passport_photo', user_id, f'passport{user_id}')
+    await replayer.photo('selfie', user_id, f'selfie{user_id}')
+    for zone in ('1', '2', '2', '3'):
+        await replayer.callback('zone_toggle', user_id, ZoneCallbackFactory(zone=zone))
+    await replayer.callback('zones_confirm', user_id, ZoneCallbackFactory(zone='confirm'))
+    await replayer.text('worker_about', user_id, 'Опыт работы 5 лет')
+    await replayer.text('worker_salary', user_id, '40')
+    await replayer.callback('work_type', user_id, WorkTypeCallbackFactory(work_type='permanent'))
+    await replayer.callback('worker_notifications', user_id, WorkerNotificationCallbackFactory(action='yes'))
+    await replayer.callback('worker_confirm', user_id, WorkerProfileConfirmationCallbackFactory(action='confirm'))
+
+    worker = await sync_to_async(Worker.objects.filter(tg_id=user_id).first)()
+    if worker:
+        await replayer.admin('admin_worker_approve', 'worker', worker.id)
+
+    return worker
+
+
+async def worker_browsing(replayer: Replayer, user_id, job):
+    await replayer.callback('worker_jobs_menu', user_id, WorkerMainSectionsCallBackFactory(destination='jobs'))
+    for page in (1, 2, 3):
+        await replayer.callback('jobs_page', user_id, WorkerPagesSectionsCallBackFactory(destination='all-jobs', page=page))
+    await replayer.callback('jobs_page', user_id, WorkerPagesSectionsCallBackFactory(destination='suitable-jobs', page=1))
+    # первый вход в ленту показывает все подходящие, повторный - только новые
+    await replayer.callback('new_jobs_feed', user_id, WorkerPagesSectionsCallBackFactory(destination='new-jobs', page=0))
+    await replayer.callback('new_jobs_feed', user_id, WorkerPagesSectionsCallBackFactory(destination='new-jobs', page=0))
+
+    if job:
+        await replayer.callback('job_details', user_id, WorkerDetailsCallBackFactory(object_name='job', object_id=job.id))
+        await replayer.callback('proposal_make', user_id, WorkerControlsCallBackFactory(control='proposal', action='make', object_id=job.id))
+
+
+async def employer_browsing(replayer: Replayer, user_id, worker):
+    await replayer.callback('employer_workers_menu', user_id, EmployerMainSectionsCallBackFactory(destination='workers'))
+    for page in (1, 2, 3):
+        await replayer.callback('workers_page', user_id, EmployerPagesSectionsCallBackFactory(destination='workers-all', page=page))
+    await replayer.callback('workers_page', user_id, EmployerPagesSectionsCallBackFactory(destination='workers-suitable', page=1))
+
+    if worker:
+        await replayer.callback('worker_details', user_id, EmployerDetailsCallBackFactory(object_name='worker', object_id=worker.id))
+
+
+async def proposal_and_review(replayer: Replayer, worker_user_id, employer_user_id):
+    proposal = await sync_to_async(WorkerCooperationProposal.objects.filter(
+        worker__tg_id=worker_user_id,
+        employer__tg_id=employer_user_id,
+    ).select_related('employer').first)()
+    if not proposal:
+        return
+
+    await replayer.callback('employer_inbox', employer_user_id, EmployerPagesSectionsCallBackFactory(destination='inbox-proposals', page=1))
+    await replayer.callback('proposal_details', employer_user_id, EmployerDetailsCallBackFactory(object_name='inbox-proposal', object_id=proposal.id))
+    await replayer.callback('proposal_accept', employer_user_id, EmployerControlsCallBackFactory(control='inbox-proposal', action='accept', object_id=proposal.id))
+
+    await replayer.callback('review_add', worker_user_id, WorkerControlsCallBackFactory(control='review', action='add', object_id=proposal.employer.id))
+    await replayer.callback('review_rate', worker_user_id, WorkerControlsCallBackFactory(control='review', action='rate', object_id=5))
+    await replayer.text('review_text', worker_user_id, 'Все отлично')
+    await replayer.callback('review_confirm', worker_user_id, WorkerControlsCallBackFactory(control='review', action='confirm'))
+
+    review = await sync_to_async(WorkerReview.objects.filter(worker__tg_id=worker_user_id).first)()
+    if review:
+        await replayer.admin('admin_review_approve', 'worker-review', review.id)
+
+
+async def full_journey(replayer: Replayer, worker_user_id, employer_user_id):
+    job = await employer_onboarding(replayer, employer_user_id)
+    worker = await worker_onboarding(replayer, worker_user_id)
+    await worker_browsing(replayer, worker_user_id, job)
+    await employer_browsing(replayer, employer_user_id, worker)
+    await proposal_and_review(replayer, worker_user_id, employer_user_id)
+
+
+async def cleanup_users(user_ids):
+    await sync_to_async(lambda: Worker.objects.filter(tg_id__in=user_ids).delete())()
+    await sync_to_async(lambda: Employer.objects.filter(tg_id__in=user_ids).delete())()
+    await sync_to_async(lambda: TGUser.objects.filter(tg_id__in=user_ids).delete())()
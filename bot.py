@@ -1,8 +1,17 @@
 import asyncio
+import logging
+
 from aiogram import Bot, Dispatcher
+from aiogram.fsm.storage.base import BaseStorage
 from aiogram.fsm.storage.redis import Redis, RedisStorage
+from prometheus_client import start_http_server
 
 import config
+from bot_session import BotAPISession
+from middlewares.instrumentation import UpdateMetricsMiddleware, HandlerNameMiddleware, BotAPIMetricsMiddleware
+from middlewares.api_scheduler import BotAPISchedulerMiddleware
+from middlewares.unchanged_edits import SkipUnchangedEditMiddleware
+from middlewares.throttling import ThrottlingMiddleware
 from handlers import (
     commands,
     profile,
@@ -25,20 +34,26 @@ from handlers import (
 
     error,
 )
+from core.db import limit_connections, connection_maintenance
+from core.matcher import matcher, listen_changes
+from middlewares.reachability import ReachabilityMiddleware
+from middlewares.db_routing import ReplicaRoutingMiddleware
+from notifications_center import digest_loop
 
 
-async def main() -> None:
-    redis = Redis(
-        host=config.REDIS_HOST,
-        port=config.REDIS_PORT,
-        db=config.REDIS_DB,
-        decode_responses=True,
-    )
-
-    storage = RedisStorage(redis=redis, state_ttl=3600 * 24)
-
-    bot = Bot(token=config.TELEGRAM_TOKEN)
+def create_dispatcher(storage: BaseStorage) -> Dispatcher:
     dp = Dispatcher(storage=storage)
+    if isinstance(storage, RedisStorage):
+        dp['redis'] = storage.redis
+
+    dp.update.outer_middleware(UpdateMetricsMiddleware())
+    dp.update.outer_middleware(ReplicaRoutingMiddleware())
+    dp.update.outer_middleware(ReachabilityMiddleware())
+    throttling = ThrottlingMiddleware()
+    dp.message.outer_middleware(throttling)
+    dp.callback_query.outer_middleware(throttling)
+    dp.message.middleware(HandlerNameMiddleware())
+    dp.callback_query.middleware(HandlerNameMiddleware())
 
     dp.include_router(commands.router)
     dp.include_router(profile.router)
@@ -59,6 +74,39 @@ async def main() -> None:
     dp.include_router(employer_pages.router)
     dp.include_router(employer_details.router)
     dp.include_router(error.router)
+
+    return dp
+
+
+async def main() -> None:
+    logging.basicConfig(level=logging.INFO)
+
+    if config.METRICS_PORT:
+        start_http_server(config.METRICS_PORT, addr=config.METRICS_HOST)
+
+    redis = Redis(
+        host=config.REDIS_HOST,
+        port=config.REDIS_PORT,
+        db=config.REDIS_DB,
+        decode_responses=True,
+    )
+
+    storage = RedisStorage(redis=redis, state_ttl=3600 * 24)
+
+    bot = Bot(token=config.TELEGRAM_TOKEN, session=BotAPISession())
+    bot.session.middleware(BotAPIMetricsMiddleware())
+    bot.session.middleware(SkipUnchangedEditMiddleware(redis))
+    bot.session.middleware(BotAPISchedulerMiddleware())
+    dp = create_dispatcher(storage)
+
+    limit_connections(asyncio.get_running_loop())
+    asyncio.create_task(connection_maintenance())
+
+    # снимок для подбора грузится в фоне, пока его нет - подбор идет запросами к БД
+    matcher.schedule_load()
+    asyncio.create_task(listen_changes(redis))
+    asyncio.create_task(digest_loop(bot, redis))
+
     await bot.delete_webhook(drop_pending_updates=True)
     await dp.start_polling(bot)
 
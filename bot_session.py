@@ -0,0 +1,123 @@
+import time
+from pathlib import Path
+
+from aiohttp import ClientSession, ClientTimeout, TraceConfig
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+from aiogram import Bot
+from aiogram.__meta__ import __version__
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer, SimpleFilesPathWrapper, BareFilesPathWrapper
+from aiogram.methods import (TelegramMethod, AnswerCallbackQuery, SendPhoto, SendDocument,
+                             SendVideo, SendAnimation, SendAudio, SendVoice, SendMediaGroup)
+from prometheus_client import Counter, Gauge, Histogram
+
+from config import (API_POOL_SIZE, API_KEEPALIVE, API_DNS_CACHE_TTL, API_CONNECT_TIMEOUT,
+                    API_TIMEOUT, API_UPLOAD_TIMEOUT, API_CALLBACK_TIMEOUT,
+                    BOT_API_URL, BOT_API_SERVER_DIR, BOT_API_FILES_DIR)
+
+
+API_POOL_LIMIT = Gauge('bot_api_pool_limit', 'Размер пула соединений с Bot API')
+API_IN_FLIGHT = Gauge('bot_api_requests_in_flight', 'Запросы к Bot API, ожидающие ответа')
+API_CONNECTIONS = Counter('bot_api_connections_total', 'Соединения, взятые из пула для запросов к Bot API', ('kind',))
+API_POOL_WAIT = Histogram('bot_api_pool_wait_seconds', 'Ожидание свободного соединения при заполненном пуле',
+                          buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, float('inf')))
+
+UPLOAD_METHODS = (SendPhoto, SendDocument, SendVideo, SendAnimation, SendAudio, SendVoice, SendMediaGroup)
+
+
+async def on_queued_start(session, context, params):
+    context.queued_at = time.perf_counter()
+
+
+async def on_queued_end(session, context, params):
+    API_POOL_WAIT.observe(time.perf_counter() - context.queued_at)
+
+
+async def on_connection_create(session, context, params):
+    API_CONNECTIONS.labels('new').inc()
+
+
+async def on_connection_reuse(session, context, params):
+    API_CONNECTIONS.labels('reused').inc()
+
+
+def api_server(base_url=BOT_API_URL, server_dir=BOT_API_SERVER_DIR, files_dir=BOT_API_FILES_DIR):
+    """Адрес Bot API: публичный или свой сервер telegram-bot-api в режиме --local.
+
+    У своего сервера get_file возвращает путь к файлу в его рабочей папке, и bot.download_file
+    читает файл с общего тома, а не скачивает по HTTP. Если у бота папка смонтирована
+    по другому пути, путь сервера переводится в локальный.
+    """
+    if not base_url:
+        return PRODUCTION
+
+    if server_dir and files_dir and server_dir != files_dir:
+        wrap_local_file = SimpleFilesPathWrapper(Path(server_dir), Path(files_dir))
+    else:
+        wrap_local_file = BareFilesPathWrapper()
+
+    return TelegramAPIServer.from_base(base_url, is_local=True, wrap_local_file=wrap_local_file)
+
+
+def pool_trace_config():
+    trace_config = TraceConfig()
+    trace_config.on_connection_queued_start.append(on_queued_start)
+    trace_config.on_connection_queued_end.append(on_queued_end)
+    trace_config.on_connection_create_end.append(on_connection_create)
+    trace_config.on_connection_reuseconn.append(on_connection_reuse)
+    return trace_config
+
+
+class BotAPISession(AiohttpSession):
+    """Сессия бота с настраиваемым пулом соединений и таймаутами по типу запроса.
+
+    Все запросы идут к одному хосту, поэтому пул ограничивается API_POOL_SIZE соединениями
+    на хост, простаивающие соединения держатся API_KEEPALIVE секунд. Загрузка файлов ждет
+    ответа дольше, подтверждение колбэка - меньше, остальные запросы - API_TIMEOUT.
+    Насыщение пула видно по метрикам: ожидание свободного соединения и число запросов в работе.
+    """
+
+    def __init__(self, pool_size=API_POOL_SIZE, **kwargs):
+        kwargs.setdefault('api', api_server())
+        super().__init__(limit=pool_size, timeout=API_TIMEOUT, **kwargs)
+        if self.proxy is None:
+            self._connector_init.update({
+                'limit_per_host': pool_size,
+                'keepalive_timeout': API_KEEPALIVE,
+                'ttl_dns_cache': API_DNS_CACHE_TTL,
+            })
+        API_POOL_LIMIT.set(pool_size)
+
+    async def create_session(self) -> ClientSession:
+        if self._should_reset_connector:
+            await self.close()
+
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=self._connector_type(**self._connector_init),
+                headers={USER_AGENT: f'{SERVER_SOFTWARE} aiogram/{__version__}'},
+                trace_configs=[pool_trace_config()],
+            )
+            self._should_reset_connector = False
+
+        return self._session
+
+    @staticmethod
+    def method_timeout(method: TelegramMethod):
+        if isinstance(method, UPLOAD_METHODS):
+            return API_UPLOAD_TIMEOUT
+        if isinstance(method, AnswerCallbackQuery):
+            return API_CALLBACK_TIMEOUT
+        return API_TIMEOUT
+
+    async def make_request(self, bot: Bot, method: TelegramMethod, timeout=None):
+        # явный таймаут (например, у long polling) не переопределяется
+        if timeout is None:
+            timeout = ClientTimeout(total=self.method_timeout(method), sock_connect=API_CONNECT_TIMEOUT)
+
+        API_IN_FLIGHT.inc()
+        try:
+            return await super().make_request(bot, method, timeout=timeout)
+        finally:
+            API_IN_FLIGHT.dec()
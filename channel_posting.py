@@ -0,0 +1,111 @@
+import asyncio
+import logging
+from collections import deque
+from dataclasses import dataclass, replace
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import InlineKeyboardMarkup
+from aiohttp import ClientError
+
+from config import CHANNEL_POST_INTERVAL, CHANNEL_POST_BATCH
+from middlewares.api_scheduler import bulk_traffic
+
+
+MAX_TEXT_LENGTH = 4096
+
+
+@dataclass(frozen=True)
+class ChannelPost:
+    text: str
+    photo: str = None
+    reply_markup: InlineKeyboardMarkup = None
+
+    def can_merge(self, other: 'ChannelPost'):
+        # склеиваются только текстовые посты с одинаковой клавиатурой, пока влезают в одно сообщение
+        return (
+            self.photo is None and other.photo is None and
+            self.reply_markup == other.reply_markup and
+            len(self.text) + len(other.text) + 2 <= MAX_TEXT_LENGTH
+            )
+
+    def merge(self, other: 'ChannelPost'):
+        return replace(self, text=f'{self.text}\n\n{other.text}')
+
+    async def send(self, bot: Bot, chat_id):
+        if self.photo:
+            await bot.send_photo(
+                chat_id=chat_id,
+                photo=self.photo,
+                caption=self.text,
+                reply_markup=self.reply_markup,
+                parse_mode='Markdown',
+            )
+        else:
+            await bot.send_message(
+                chat_id=chat_id,
+                text=self.text,
+                reply_markup=self.reply_markup,
+                parse_mode='Markdown',
+            )
+
+
+class ChannelPoster:
+    """Публикация в каналы: у каждого канала своя очередь и свой темп.
+
+    Каналы публикуют параллельно, каждый не чаще раза в CHANNEL_POST_INTERVAL секунд.
+    Если за это время в очереди канала накопилось несколько текстовых постов,
+    до CHANNEL_POST_BATCH из них уходят одним сообщением. Если склейку не приняли
+    (например, из-за разметки одного из постов), посты отправляются по одному.
+    """
+
+    def __init__(self):
+        self._queues = {}
+        self._wakeups = {}
+        self._tasks = {}
+
+    def publish(self, bot: Bot, chat_ids, post: ChannelPost):
+        for chat_id in chat_ids:
+            if chat_id not in self._queues:
+                self._queues[chat_id] = deque()
+                self._wakeups[chat_id] = asyncio.Event()
+
+            self._queues[chat_id].append(post)
+            self._wakeups[chat_id].set()
+
+            task = self._tasks.get(chat_id)
+            if task is None or task.done():
+                self._tasks[chat_id] = asyncio.create_task(self._run(bot, chat_id))
+
+    async def _run(self, bot: Bot, chat_id):
+        queue, wakeup = self._queues[chat_id], self._wakeups[chat_id]
+        while True:
+            while not queue:
+                wakeup.clear()
+                await wakeup.wait()
+
+            post = queue.popleft()
+            posts = [post]
+            while queue and len(posts) < CHANNEL_POST_BATCH and post.can_merge(queue[0]):
+                posts.append(queue.popleft())
+                post = post.merge(posts[-1])
+
+            if not await self._send(bot, chat_id, post) and len(posts) > 1:
+                for single in posts:
+                    await asyncio.sleep(CHANNEL_POST_INTERVAL)
+                    await self._send(bot, chat_id, single)
+
+            await asyncio.sleep(CHANNEL_POST_INTERVAL)
+
+    @staticmethod
+    async def _send(bot: Bot, chat_id, post: ChannelPost):
+        try:
+            with bulk_traffic():
+                await post.send(bot, chat_id)
+            return True
+        except (TelegramAPIError, ClientError, asyncio.TimeoutError):
+            logging.exception('Channel post to %s failed', chat_id)
+            return False
+
+
+poster = ChannelPoster()
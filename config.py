@@ -16,4 +16,38 @@ REDIS_DB = int(os.getenv('REDIS_DB'))
 
 PER_PAGE = 5
 MAX_SYMBOLS = 4000 # максимально допустимая длина сообщения (для показа всех вакансий/отзывов)
-MAX_LEN = 1000 # максимально допустимая длина отзыва/описания вакансии/рассказа о себе
\ No newline at end of file
+MAX_LEN = 1000 # максимально допустимая длина отзыва/описания вакансии/рассказа о себе
+EDIT_HASH_TTL = int(os.getenv('EDIT_HASH_TTL', 3600 * 48)) # сколько хранится хэш содержимого отправленного/отредактированного сообщения, сек
+RENDER_SKIP_SECONDS = int(os.getenv('RENDER_SKIP_SECONDS', 30)) # повторное нажатие той же кнопки в течение этого времени не перерисовывает экран
+THROTTLE_RATE = float(os.getenv('THROTTLE_RATE', 2)) # апдейтов в секунду от одного пользователя
+THROTTLE_BURST = int(os.getenv('THROTTLE_BURST', 10)) # сколько апдейтов подряд можно прислать сверх частоты
+THROTTLE_DUPLICATE_MS = int(os.getenv('THROTTLE_DUPLICATE_MS', 700)) # одинаковые колбэки чаще этого интервала схлопываются (0 - не схлопывать)
+CATALOGUE_TTL = int(os.getenv('CATALOGUE_TTL', 300)) # время жизни кэша зон, кнопок и текстов в памяти бота, сек
+LISTINGS_TTL = int(os.getenv('LISTINGS_TTL', 60)) # время жизни кэша списков "все вакансии"/"все работники", сек
+MATCHER_REFRESH_SECONDS = int(os.getenv('MATCHER_REFRESH_SECONDS', 600)) # как часто снимок для подбора вакансий/работников перечитывается из БД целиком, сек
+DIGEST_INTERVAL = int(os.getenv('DIGEST_INTERVAL', 3600 * 24)) # как часто отправляются сводки уведомлений тем, кто их выбрал, сек
+DIGEST_BATCH = int(os.getenv('DIGEST_BATCH', 100)) # сколько получателей сводки обрабатывается за один запрос к БД
+CHANNEL_POST_INTERVAL = float(os.getenv('CHANNEL_POST_INTERVAL', 10)) # пауза между постами в одном канале, сек (каналы публикуют параллельно)
+CHANNEL_POST_BATCH = int(os.getenv('CHANNEL_POST_BATCH', 5)) # сколько накопившихся постов с вакансиями можно склеить в одно сообщение канала (1 - не склеивать)
+UNREACHABLE_TTL = int(os.getenv('UNREACHABLE_TTL', 300)) # как часто бот перечитывает из БД список пользователей, до которых не доходят сообщения, сек
+API_RATE = float(os.getenv('API_RATE', 25)) # общий темп запросов бота к Bot API, в секунду (лимит телеграма - около 30)
+API_MIN_RATE = float(os.getenv('API_MIN_RATE', 1)) # ниже этого темпа массовые запросы не замедляются после ответов 429, в секунду
+API_BURST = int(os.getenv('API_BURST', 30)) # сколько запросов к Bot API можно отправить подряд сверх темпа
+API_INTERACTIVE_RESERVE = int(os.getenv('API_INTERACTIVE_RESERVE', 10)) # сколько запросов из запаса рассылки оставляют для ответов пользователям
+API_POOL_SIZE = int(os.getenv('API_POOL_SIZE', 100)) # сколько одновременных соединений с Bot API держит бот
+API_KEEPALIVE = float(os.getenv('API_KEEPALIVE', 60)) # сколько простаивающее соединение с Bot API остается открытым, сек
+API_DNS_CACHE_TTL = int(os.getenv('API_DNS_CACHE_TTL', 3600)) # время жизни кэша DNS для адреса Bot API, сек
+API_CONNECT_TIMEOUT = float(os.getenv('API_CONNECT_TIMEOUT', 10)) # таймаут установки соединения с Bot API, сек
+API_TIMEOUT = float(os.getenv('API_TIMEOUT', 30)) # таймаут запроса к Bot API, сек
+API_UPLOAD_TIMEOUT = float(os.getenv('API_UPLOAD_TIMEOUT', 120)) # таймаут запросов с загрузкой файлов (фото, документы), сек
+API_CALLBACK_TIMEOUT = float(os.getenv('API_CALLBACK_TIMEOUT', 10)) # таймаут подтверждения колбэка, сек
+BOT_API_URL = os.getenv('BOT_API_URL') # адрес своего сервера telegram-bot-api, например http://telegram-bot-api:8081 (пусто - публичный api.telegram.org)
+BOT_API_SERVER_DIR = os.getenv('BOT_API_SERVER_DIR') # рабочая папка сервера telegram-bot-api (--dir), как ее видит сервер
+BOT_API_FILES_DIR = os.getenv('BOT_API_FILES_DIR') # та же папка, смонтированная у бота (пусто - путь совпадает с BOT_API_SERVER_DIR)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 4)) # сколько потоков бота (и соединений с БД) выполняют фоновые запросы, кроме потока хендлеров
+DB_CHECK_INTERVAL = int(os.getenv('DB_CHECK_INTERVAL', 60)) # как часто бот проверяет соединение с БД и закрывает устаревшее, сек
+DB_REPLICA_STICKY_SECONDS = float(os.getenv('DB_REPLICA_STICKY_SECONDS', 5)) # сколько после своей записи пользователь читает из основной БД, а не из реплики, сек
+
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0)) # порт для метрик prometheus (0 - не запускать)
+SLOW_UPDATE_SECONDS = float(os.getenv('SLOW_UPDATE_SECONDS', 1)) # апдейты дольше порога логируются вместе со списком запросов
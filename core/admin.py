@@ -1,11 +1,14 @@
 from django.contrib import admin
-from django.db.models import Q
+from django.db import transaction
+from django.utils import timezone
+from django.db.models import Q, Exists, OuterRef
 from adminsortable2.admin import SortableAdminMixin
 
 from core.models import (Text, Button, TGUser, Worker, 
                          Employer, Job, WorkerReview, EmployerReview,
                          ChannelForWorkers, ChannelForEmployers,
                          WorkerCooperationProposal, EmployerCooperationProposal,)
+from core.tasks import generate_passport_thumbnail
 
 
 @admin.register(Text)
@@ -32,7 +35,7 @@ class ButtonAdmin(SortableAdminMixin, admin.ModelAdmin):
 
 @admin.register(TGUser)
 class TGUserAdmin(admin.ModelAdmin):
-    list_display = ('tg_id', 'target', 'created_at',)
+    list_display = ('tg_id', 'target', 'unreachable_since', 'created_at',)
     list_filter = ('target',)
     search_fields = ('tg_id',)
 
@@ -42,29 +45,52 @@ class TGUserAdmin(admin.ModelAdmin):
 
 @admin.register(Worker)
 class WorkerAdmin(admin.ModelAdmin):
-    list_display = ('final_min_salary', 'created_at', 'is_searching', 'is_approved', 'get_thumbnail')
+    list_display = ('final_min_salary', 'zones', 'created_at', 'is_searching', 'is_approved', 'get_thumbnail')
     list_filter = ('areas', 'is_searching', 'is_approved',)
     search_fields = ('tg_id', 'phone', 'username',)
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('areas')
+
+    def save_model(self, request, obj, form, change):
+        photo_changed = 'passport_photo' in form.changed_data
+        if photo_changed:
+            obj.passport_thumbnail_url = None
+
+        super().save_model(request, obj, form, change)
+
+        # миниатюра нового фото генерируется в фоне, список работников ее только показывает
+        if photo_changed and obj.passport_photo_id:
+            transaction.on_commit(lambda: generate_passport_thumbnail.delay(obj.id))
+
     def final_min_salary(self, obj):
         return f'{obj.min_salary}₪'
 
+    def zones(self, obj):
+        return obj.readable_zones
+
     final_min_salary.short_description = 'минимальная зарплата'
+    zones.short_description = 'зоны'
 
 @admin.register(Employer)
 class EmployerAdmin(admin.ModelAdmin):
     list_display = ('tg_id', 'username', 'phone', 'created_at', 'are_active_jobs',)
     search_fields = ('tg_id', 'phone', 'username',)
 
-    def are_active_jobs(self, obj):
-        jobs = obj.jobs.filter(Q(is_active=True) & Q(is_approved=True)).all()
+    def get_queryset(self, request):
+        active_jobs = Job.objects.filter(
+            Q(employer=OuterRef('pk')) &
+            Q(is_active=True) &
+            Q(is_approved=True)
+        )
+        return super().get_queryset(request).annotate(has_active_jobs=Exists(active_jobs))
 
-        if jobs:
-            return True
-        return False
+    def are_active_jobs(self, obj):
+        return obj.has_active_jobs
     
     are_active_jobs.short_description = 'Есть активные вакансии?'
     are_active_jobs.boolean = True
+    are_active_jobs.admin_order_field = 'has_active_jobs'
 
 
 @admin.register(ChannelForWorkers)
@@ -81,19 +107,35 @@ class ChannelForEmployersAdmin(admin.ModelAdmin):
 
 @admin.register(Job)
 class JobAdmin(admin.ModelAdmin):
-    list_display = ('final_min_salary', 'created_at', 'is_approved', 'is_active')
+    list_display = ('final_min_salary', 'zones', 'created_at', 'is_approved', 'is_active')
     list_filter = ('areas', 'is_active', 'is_approved',)
+    readonly_fields = ('approved_at',)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('areas')
+
+    def save_model(self, request, obj, form, change):
+        # одобрение из админки тоже попадает в ленту новых вакансий
+        if 'is_approved' in form.changed_data and obj.is_approved:
+            obj.approved_at = timezone.now()
+
+        super().save_model(request, obj, form, change)
 
     def final_min_salary(self, obj):
         return f'{obj.min_salary}₪'
 
+    def zones(self, obj):
+        return obj.readable_zones
+
     final_min_salary.short_description = 'минимальная зарплата'
+    zones.short_description = 'зоны'
 
 
 @admin.register(WorkerCooperationProposal)
 class WorkerCooperationProposalAdmin(admin.ModelAdmin):
     list_display = ('worker_phone', 'employer_phone', 'created_at', 'is_accepted', 'is_proceeded')
     list_filter = ('is_accepted', 'is_proceeded',)
+    list_select_related = ('worker', 'employer',)
 
     def worker_min_salary(self, obj):
         return f'{obj.worker.min_salary}₪'
@@ -117,6 +159,7 @@ class WorkerCooperationProposalAdmin(admin.ModelAdmin):
 class EmployerCooperationProposalAdmin(admin.ModelAdmin):
     list_display = ('worker_phone', 'employer_phone', 'created_at', 'is_accepted', 'is_proceeded')
     list_filter = ('is_accepted', 'is_proceeded',)
+    list_select_related = ('worker', 'employer',)
 
     def worker_min_salary(self, obj):
         return f'{obj.worker.min_salary}₪'
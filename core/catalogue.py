@@ -0,0 +1,79 @@
+import time
+
+from asgiref.sync import sync_to_async
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from config import CATALOGUE_TTL
+from core.models import Area, Button, Text
+
+
+# справочники (зоны, кнопки, тексты) меняются редко, поэтому держатся в памяти процесса;
+# изменения в этом процессе сбрасывают кэш сигналами, изменения из админки
+# (другой процесс) подхватываются по истечении CATALOGUE_TTL
+_cache = {}
+
+
+def _get(key):
+    value, expires_at = _cache.get(key, (None, 0))
+    if time.monotonic() < expires_at:
+        return value
+
+
+def _set(key, value):
+    _cache[key] = (value, time.monotonic() + CATALOGUE_TTL)
+
+
+def invalidate(key=None):
+    if key is None:
+        _cache.clear()
+    else:
+        _cache.pop(key, None)
+
+
+async def get_areas():
+    areas = _get('areas')
+    if areas is None:
+        areas = await sync_to_async(lambda: list(Area.objects.order_by('id')))()
+        _set('areas', areas)
+
+    return areas
+
+
+async def get_button(slug):
+    buttons = _get('buttons')
+    if buttons is None:
+        buttons = await sync_to_async(lambda: {button.slug: button for button in Button.objects.all()})()
+        _set('buttons', buttons)
+
+    if slug not in buttons:
+        raise Button.DoesNotExist(f'Button {slug} does not exist')
+
+    return buttons[slug]
+
+
+async def get_text(slug):
+    texts = _get('texts')
+    if texts is None:
+        texts = await sync_to_async(lambda: {text.slug: text for text in Text.objects.all()})()
+        _set('texts', texts)
+
+    if slug not in texts:
+        raise Text.DoesNotExist(f'Text {slug} does not exist')
+
+    return texts[slug]
+
+
+@receiver((post_save, post_delete), sender=Area)
+def invalidate_areas(sender, **kwargs):
+    invalidate('areas')
+
+
+@receiver((post_save, post_delete), sender=Button)
+def invalidate_buttons(sender, **kwargs):
+    invalidate('buttons')
+
+
+@receiver((post_save, post_delete), sender=Text)
+def invalidate_texts(sender, **kwargs):
+    invalidate('texts')
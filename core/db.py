@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.db import connections, close_old_connections
+from django.db.backends.signals import connection_created
+from prometheus_client import Counter, Gauge
+
+from config import DB_CHECK_INTERVAL, DB_POOL_SIZE
+
+
+# вне веб-запросов django сам не закрывает и не проверяет соединения (это делается по сигналам
+# начала/конца запроса), поэтому в боте соединение потока sync_to_async живет, пока его не оборвет сервер.
+# здесь то же самое делается по таймеру: раз в DB_CHECK_INTERVAL соединение помечается для проверки
+# (CONN_HEALTH_CHECKS - один ping перед следующим запросом) и закрывается, если старше CONN_MAX_AGE
+# или на нем была ошибка. следующий запрос откроет новое
+DB_CONNECTIONS_OPENED = Counter('bot_db_connections_opened_total', 'Открытые соединения с БД')
+DB_CONNECTIONS_RECYCLED = Counter('bot_db_connections_recycled_total', 'Соединения с БД, закрытые проверкой (устарели или с ошибкой)')
+DB_POOL_LIMIT = Gauge('bot_db_pool_limit', 'Наибольшее число соединений с БД у бота (потоки для запросов)')
+
+
+def count_connection(sender, connection, **kwargs):
+    DB_CONNECTIONS_OPENED.inc()
+
+
+connection_created.connect(count_connection)
+
+
+def check_connection():
+    opened = [conn for conn in connections.all(initialized_only=True) if conn.connection is not None]
+    close_old_connections()
+    DB_CONNECTIONS_RECYCLED.inc(sum(1 for conn in opened if conn.connection is None))
+
+
+def limit_connections(loop: asyncio.AbstractEventLoop):
+    """Ограничивает число соединений с БД: у каждого потока, выполняющего запросы, свое соединение.
+
+    Хендлеры ходят в БД через один поток (sync_to_async с thread_sensitive), фоновые загрузки
+    (thread_sensitive=False) - через пул потоков цикла событий, он ограничивается DB_POOL_SIZE.
+    """
+    loop.set_default_executor(ThreadPoolExecutor(max_workers=DB_POOL_SIZE, thread_name_prefix='db'))
+    DB_POOL_LIMIT.set(DB_POOL_SIZE + 1)
+
+
+async def connection_maintenance():
+    """Фоновая проверка соединений, через которые идут запросы хендлеров (thread_sensitive)."""
+    while True:
+        await asyncio.sleep(DB_CHECK_INTERVAL)
+        try:
+            await sync_to_async(check_connection)()
+        except Exception:
+            logging.exception('Connection maintenance failed')
@@ -0,0 +1,108 @@
+import time
+import asyncio
+import datetime
+
+from aiogram.exceptions import (TelegramAPIError, TelegramForbiddenError, TelegramRetryAfter,
+                                TelegramNetworkError, TelegramServerError)
+from aiohttp import ClientError
+from asgiref.sync import sync_to_async
+
+from config import UNREACHABLE_TTL
+from core.models import TGUser
+from middlewares.api_scheduler import bulk_traffic
+
+
+BLOCKED = 'blocked'
+DEACTIVATED = 'deactivated'
+CHAT_NOT_FOUND = 'chat_not_found'
+RATE_LIMITED = 'rate_limited'
+NETWORK = 'network'
+OTHER = 'other'
+
+# после таких ошибок писать пользователю бесполезно, пока он сам снова не напишет боту
+PERMANENT_FAILURES = (BLOCKED, DEACTIVATED, CHAT_NOT_FOUND)
+# такие ошибки проходят сами, отправку имеет смысл повторить позже
+TRANSIENT_FAILURES = (RATE_LIMITED, NETWORK)
+
+# tg_id недоступных пользователей держатся в памяти процесса, чтобы рассылки
+# отсекали их без запросов; отметки из других процессов подхватываются по истечении UNREACHABLE_TTL
+_cache = {'tg_ids': None, 'expires_at': 0}
+
+
+def classify_failure(error_code, description):
+    """Причина неудачной отправки по коду и описанию ошибки Bot API."""
+    description = (description or '').lower()
+
+    if error_code == 429:
+        return RATE_LIMITED
+    if 'deactivated' in description:
+        return DEACTIVATED
+    if 'chat not found' in description or 'user not found' in description:
+        return CHAT_NOT_FOUND
+    # 403: бот заблокирован, удален из чата или пользователь ни разу не запускал бота
+    if error_code == 403:
+        return BLOCKED
+
+    return OTHER
+
+
+def classify_error(error: TelegramAPIError):
+    if isinstance(error, TelegramRetryAfter):
+        return RATE_LIMITED
+    if isinstance(error, (TelegramNetworkError, TelegramServerError)):
+        return NETWORK
+
+    error_code = 403 if isinstance(error, TelegramForbiddenError) else 400
+    return classify_failure(error_code, error.message)
+
+
+def mark_unreachable(tg_id):
+    TGUser.objects.filter(tg_id=tg_id, unreachable_since__isnull=True).update(unreachable_since=datetime.datetime.now())
+    if _cache['tg_ids'] is not None:
+        _cache['tg_ids'].add(str(tg_id))
+
+
+def mark_reachable(tg_id):
+    TGUser.objects.filter(tg_id=tg_id, unreachable_since__isnull=False).update(unreachable_since=None)
+    if _cache['tg_ids'] is not None:
+        _cache['tg_ids'].discard(str(tg_id))
+
+
+async def unreachable_chats():
+    if _cache['tg_ids'] is None or time.monotonic() > _cache['expires_at']:
+        _cache['tg_ids'] = await sync_to_async(lambda: set(
+            TGUser.objects.filter(unreachable_since__isnull=False).values_list('tg_id', flat=True)
+            ))()
+        _cache['expires_at'] = time.monotonic() + UNREACHABLE_TTL
+
+    return _cache['tg_ids']
+
+
+async def reachable(tg_ids):
+    unreachable = await unreachable_chats()
+    return [tg_id for tg_id in tg_ids if str(tg_id) not in unreachable]
+
+
+async def deliver(method, chat_id, **kwargs):
+    """Отправляет сообщение пользователю методом бота: None - если дошло, иначе причина неудачи.
+
+    Пользователь, до которого писать бесполезно (заблокировал бота, удален, чат не найден),
+    помечается недоступным. При 429 - одна повторная попытка после паузы, которую просит Telegram.
+    Запросы идут как массовые и уступают очередь ответам пользователям.
+    """
+    for _ in range(2):
+        try:
+            with bulk_traffic():
+                await method(chat_id=chat_id, **kwargs)
+            return None
+        except TelegramRetryAfter as error:
+            await asyncio.sleep(error.retry_after)
+        except TelegramAPIError as error:
+            failure = classify_error(error)
+            if failure in PERMANENT_FAILURES:
+                await sync_to_async(mark_unreachable)(chat_id)
+            return failure
+        except (ClientError, asyncio.TimeoutError):
+            return NETWORK
+
+    return RATE_LIMITED
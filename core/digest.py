@@ -0,0 +1,65 @@
+from redis.asyncio import Redis
+
+
+# очередь сводок в redis: для каждого получателя - множество id подошедших объектов
+# (digest:{kind}:{tg_id}), плюс общее множество получателей с непустой сводкой (digest:{kind}).
+# kind - 'jobs' (вакансии для работников) или 'workers' (работники для работодателей)
+POP_SCRIPT = '''
+local tg_ids = redis.call('SPOP', KEYS[1], ARGV[1])
+local result = {}
+for _, tg_id in ipairs(tg_ids) do
+    local key = KEYS[1] .. ':' .. tg_id
+    table.insert(result, tg_id)
+    table.insert(result, redis.call('SMEMBERS', key))
+    redis.call('DEL', key)
+end
+return result
+'''
+
+_scripts = {}
+
+
+def recipients_key(kind):
+    return f'digest:{kind}'
+
+
+async def enqueue(redis: Redis, kind, tg_ids, object_id):
+    """Добавляет объект в сводки получателей."""
+    if not tg_ids:
+        return
+
+    # транзакция: получатель и его объект появляются в очереди одновременно
+    async with redis.pipeline(transaction=True) as pipe:
+        for tg_id in tg_ids:
+            pipe.sadd(f'{recipients_key(kind)}:{tg_id}', object_id)
+        pipe.sadd(recipients_key(kind), *tg_ids)
+        await pipe.execute()
+
+
+async def requeue(redis: Redis, kind, batch):
+    """Возвращает в очередь сводки, которые не удалось отправить: {tg_id: [id объектов]}."""
+    if not batch:
+        return
+
+    async with redis.pipeline(transaction=True) as pipe:
+        for tg_id, object_ids in batch.items():
+            pipe.sadd(f'{recipients_key(kind)}:{tg_id}', *object_ids)
+        pipe.sadd(recipients_key(kind), *batch)
+        await pipe.execute()
+
+
+async def pop_batch(redis: Redis, kind, size):
+    """Забирает из очереди сводки не более чем size получателей: {tg_id: [id объектов]}."""
+    # получатели и их объекты забираются атомарно, иначе объект, добавленный
+    # между выборкой получателя и удалением его сводки, потеряется
+    if id(redis) not in _scripts:
+        _scripts[id(redis)] = redis.register_script(POP_SCRIPT)
+
+    result = await _scripts[id(redis)](keys=[recipients_key(kind)], args=[size])
+
+    batch = {}
+    for tg_id, object_ids in zip(result[::2], result[1::2]):
+        if object_ids:
+            batch[str(tg_id)] = sorted((int(object_id) for object_id in object_ids), reverse=True)
+
+    return batch
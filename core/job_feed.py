@@ -0,0 +1,45 @@
+import datetime
+from dataclasses import replace
+
+from aiogram.fsm.context import FSMContext
+from asgiref.sync import sync_to_async
+from django.db.models import Q
+
+from core.models import Job
+
+
+# курсор ленты хранится в отдельной "ячейке" FSM (destiny), поэтому state.clear()
+# при навигации по разделам его не стирает
+FEED_DESTINY = 'jobs_feed'
+
+
+def feed_context(state: FSMContext) -> FSMContext:
+    return FSMContext(storage=state.storage, key=replace(state.key, destiny=FEED_DESTINY))
+
+
+def newer_than(cursor):
+    """Условие keyset-запроса: вакансии, одобренные после курсора (approved_at, id)."""
+    approved_at, job_id = datetime.datetime.fromisoformat(cursor[0]), cursor[1]
+    return Q(approved_at__gt=approved_at) | (Q(approved_at=approved_at) & Q(id__gt=job_id))
+
+
+async def open_feed(state: FSMContext):
+    """Начинает просмотр ленты: запоминает, с какого места показывать, и сдвигает курсор на последнюю одобренную вакансию.
+
+    Вакансия попадает в ленту, когда ее одобряют, а не когда создают: иначе вакансия,
+    одобренная после просмотра ленты, оказалась бы позади курсора и в ленту не попала.
+    """
+    feed = feed_context(state)
+    feed_data = await feed.get_data()
+
+    latest = await sync_to_async(
+        Job.objects.filter(approved_at__isnull=False).order_by('-approved_at', '-id').values_list('approved_at', 'id').first
+    )()
+    cursor = [latest[0].isoformat(), latest[1]] if latest else feed_data.get('cursor')
+
+    await feed.set_data({'since': feed_data.get('cursor'), 'cursor': cursor})
+
+
+async def feed_since(state: FSMContext):
+    feed_data = await feed_context(state).get_data()
+    return feed_data.get('since')
@@ -0,0 +1,85 @@
+import time
+import asyncio
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from config import LISTINGS_TTL
+from core.models import Worker, Job, zones_text
+
+
+# строка списка: id объекта, зарплата и зоны - все, что нужно для кнопки в списке
+ListingRow = namedtuple('ListingRow', ('id', 'min_salary', 'zones'))
+
+# общие для всех пользователей списки ("все вакансии", "все работники") считаются один раз
+# и хранятся в памяти процесса бота; сигналы сбрасывают их при изменении вакансий/работников,
+# изменения из других процессов (админка) подхватываются по истечении LISTINGS_TTL
+_cache = {}
+_generations = {}
+_locks = {}
+
+
+def listing_row(obj):
+    return ListingRow(obj.id, obj.min_salary, zones_text(obj.zone_mask))
+
+
+def load_all_jobs():
+    jobs = Job.objects.filter(is_active=True, is_approved=True)
+    return [listing_row(job) for job in jobs]
+
+
+def load_all_workers():
+    workers = Worker.objects.filter(is_approved=True, is_searching=True)
+    return [listing_row(worker) for worker in workers]
+
+
+LOADERS = {
+    'jobs': load_all_jobs,
+    'workers': load_all_workers,
+}
+
+
+def invalidate(name):
+    _generations[name] = _generations.get(name, 0) + 1
+    _cache.pop(name, None)
+
+
+def _get(name):
+    rows, expires_at = _cache.get(name, (None, 0))
+    if time.monotonic() < expires_at:
+        return rows
+
+
+async def get_listing(name):
+    rows = _get(name)
+    if rows is not None:
+        return rows
+
+    # одновременные промахи ждут одного вычисления
+    lock = _locks.setdefault(name, asyncio.Lock())
+    async with lock:
+        rows = _get(name)
+        if rows is None:
+            generation = _generations.get(name, 0)
+            rows = await sync_to_async(LOADERS[name])()
+
+            # если список сбросили, пока он считался, результат уже устарел
+            if generation == _generations.get(name, 0):
+                _cache[name] = (rows, time.monotonic() + LISTINGS_TTL)
+
+    return rows
+
+
+# сброс после коммита, иначе параллельный запрос может успеть закэшировать старые данные;
+# зоны меняются только вместе со сбросом подтверждения, поэтому m2m_changed здесь не нужен
+@receiver((post_save, post_delete), sender=Job)
+def invalidate_jobs(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate('jobs'))
+
+
+@receiver((post_save, post_delete), sender=Worker)
+def invalidate_workers(sender, **kwargs):
+    transaction.on_commit(lambda: invalidate('workers'))
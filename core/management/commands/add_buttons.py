@@ -19,6 +19,8 @@ class Command(BaseCommand):
             ['change_cv', 'Изменить резюме', ''],
             ['enable_notifications', 'Включить уведомления', 'הפעל התראות'],
             ['disable_notifications', 'Отключить уведомления', 'כבה התראות'],
+            ['digest_enable', '📬 Присылать уведомления сводкой', '📬 שלחו התראות בסיכום'],
+            ['digest_disable', '🔔 Присылать уведомления сразу', '🔔 שלחו התראות מיד'],
             ['searching_yes', 'Установить "ищу работу"', ''],
             ['searching_no', 'Установить "не ищу работу"', ''],
             ['main_menu', 'Главное меню 🏠', 'תפריט ראשי 🏠'],
@@ -33,6 +35,7 @@ class Command(BaseCommand):
             ['my_jobs', 'Мои вакансии', 'המשרות שלי'],
             ['all_jobs', 'Все вакансии', 'הכל'],
             ['jobs_suitable', 'Подходящие вакансии', ''],
+            ['jobs_new', '🆕 Новые подходящие вакансии', ''],
             ['jobs_active', '✅ Активные', '✅ פעיל'],
             ['jobs_archive', '🗄 Архив', '🗄 ארכיון'],
             ['jobs_declined', '❌ Отклоненные', '❌ נדחו'],
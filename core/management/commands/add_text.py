@@ -41,6 +41,8 @@ class Command(BaseCommand):
             ['salary_hourly', '₪', '₪'],
             ['rating', 'Рейтинг:', 'דירוג:'],
             ['new_worker_interesting', 'Это резюме может вас заинтересовать:', 'קורות חיים אלה עשויים לעניין אותך:'],
+            ['digest_jobs', 'Новые вакансии, которые могут вас заинтересовать:', ''],
+            ['digest_workers', '', 'קורות חיים חדשים שעשויים לעניין אותך:'],
             ['saved', 'Данные сохранены', 'הנתונים נשמרו'],
             ['choose_menu_section', 'Выберите раздел меню:', 'בחר סעיף בתפריט:'],
             ['choose_jobs_type', 'Выберите категорию вакансий:', 'בחר קטגוריית משרות:'],
@@ -60,6 +62,7 @@ class Command(BaseCommand):
             ['job_declined', 'Ваша вакансия отклонена', 'המשרה שלכם נדחתה.'],
             ['all_jobs', 'Все вакансии:', 'כל המשרות:'],
             ['jobs_suitable', 'Подходящие вакансии:', 'משרות מתאימות:'],
+            ['jobs_new', 'Новые подходящие вакансии с прошлого просмотра:', ''],
             ['jobs_active', '✅ Активные вакансии:', '✅ משרות פעילות:'],
             ['jobs_archive', '🗄 Архивные вакансии:', '🗄 משרות בארכיון:'],
             ['jobs_declined', '❌ Отклоненные вакансии:', '❌ משרות נדחות:'],
@@ -0,0 +1,19 @@
+from django.core.management import BaseCommand
+
+from core.models import Worker
+from core.tasks import generate_passport_thumbnail
+
+
+class Command(BaseCommand):
+    help = 'Генерирует миниатюры паспортов для работников, у которых их еще нет'
+
+    def handle(self, *args, **options):
+        worker_ids = list(Worker.objects.filter(
+            passport_photo__isnull=False,
+            passport_thumbnail_url__isnull=True,
+        ).values_list('id', flat=True))
+
+        for worker_id in worker_ids:
+            generate_passport_thumbnail(worker_id)
+
+        print(f'generated {len(worker_ids)} thumbnails')
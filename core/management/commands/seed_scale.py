@@ -0,0 +1,250 @@
+import time
+import random
+
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import F
+
+from core.models import (TGUser, Area, Worker, Employer, Job,
+                         WorkerCooperationProposal, EmployerCooperationProposal,
+                         WorkerReview, EmployerReview, zones_mask)
+
+
+# синтетические пользователи получают tg_id вне диапазона реальных телеграм id,
+# поэтому их можно найти и удалить по префиксу
+TG_ID_PREFIX = '8800'
+TG_ID_WIDTH = 13
+
+
+def synthetic_tg_id(num):
+    return f'{TG_ID_PREFIX}{num:0{TG_ID_WIDTH - len(TG_ID_PREFIX)}d}'
+
+
+def random_zones(areas):
+    # большинство выбирает одну-две зоны, меньшинство - все
+    count = random.choices((1, 2, 3), weights=(55, 30, 15))[0]
+    return random.sample(areas, min(count, len(areas)))
+
+
+def random_salary(mean, spread, minimum):
+    return max(minimum, int(random.gauss(mean, spread)))
+
+
+def random_rate():
+    return random.choices((1, 2, 3, 4, 5), weights=(3, 4, 10, 28, 55))[0]
+
+
+def ids_by_tg_id(model):
+    return dict(model.objects.filter(tg_id__startswith=TG_ID_PREFIX).values_list('tg_id', 'id'))
+
+
+class Command(BaseCommand):
+    help = 'Создает синтетических работников, работодателей, вакансии, запросы и отзывы для нагрузочного тестирования'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=1000)
+        parser.add_argument('--employers', type=int, default=200)
+        parser.add_argument('--jobs', type=int, default=1000)
+        parser.add_argument('--proposals', type=int, default=None, help='по умолчанию - по 2 на работника')
+        parser.add_argument('--reviews', type=int, default=None, help='по умолчанию - треть от числа запросов')
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=None)
+        parser.add_argument('--clear', action='store_true', help='удалить ранее созданные синтетические данные')
+
+    def handle(self, *args, **options):
+        random.seed(options['seed'])
+        self.batch_size = options['batch_size']
+        start = time.perf_counter()
+
+        if options['clear']:
+            self.clear()
+
+        areas = list(Area.objects.all())
+        if not areas:
+            print('no areas, run add_zones first')
+            return
+
+        with transaction.atomic():
+            offset = TGUser.objects.filter(tg_id__startswith=TG_ID_PREFIX).count()
+            workers = self.create_workers(options['workers'], offset, areas)
+            employers = self.create_employers(options['employers'], offset + options['workers'])
+            jobs = self.create_jobs(options['jobs'], employers, areas)
+
+            proposals = options['proposals']
+            if proposals is None:
+                proposals = options['workers'] * 2
+            reviews = options['reviews']
+            if reviews is None:
+                reviews = proposals // 3
+
+            self.create_proposals(proposals, workers, employers, jobs)
+            self.create_reviews(reviews, workers, employers)
+
+        print(f'done in {time.perf_counter() - start:.1f}s')
+
+    def bulk_create(self, model, objects):
+        model.objects.bulk_create(objects, batch_size=self.batch_size)
+        print(f'{model.__name__}: {len(objects)}')
+
+    def create_workers(self, count, offset, areas):
+        if not count:
+            return []
+
+        tg_ids = [synthetic_tg_id(offset + num) for num in range(count)]
+        zones = [random_zones(areas) for _ in tg_ids]
+        self.bulk_create(TGUser, [TGUser(tg_id=tg_id, target='1') for tg_id in tg_ids])
+        self.bulk_create(Worker, [
+            Worker(
+                tg_id=tg_id,
+                username=f'worker{tg_id}',
+                name=f'Worker {tg_id[-6:]}',
+                phone=f'+7{tg_id[-10:]}',
+                selfie=f'selfie{tg_id}',
+                permanent_work=random.random() < 0.6,
+                about='Опыт работы с детьми и пожилыми людьми',
+                about_heb='Опыт работы с детьми и пожилыми людьми',
+                min_salary=random_salary(45, 10, 30),
+                notifications=random.random() < 0.5,
+                is_searching=random.random() < 0.8,
+                is_approved=random.choices((True, False, None), weights=(85, 5, 10))[0],
+                zone_mask=zones_mask(area.number for area in worker_zones),
+            ) for tg_id, worker_zones in zip(tg_ids, zones)
+        ])
+
+        # bulk_create в MySQL не возвращает первичные ключи
+        worker_ids = ids_by_tg_id(Worker)
+        workers = [worker_ids[tg_id] for tg_id in tg_ids]
+        self.bulk_create(Worker.areas.through, [
+            Worker.areas.through(worker_id=worker_id, area_id=area.id)
+            for worker_id, worker_zones in zip(workers, zones) for area in worker_zones
+        ])
+
+        return workers
+
+    def create_employers(self, count, offset):
+        if not count:
+            return []
+
+        tg_ids = [synthetic_tg_id(offset + num) for num in range(count)]
+        self.bulk_create(TGUser, [TGUser(tg_id=tg_id, target='2') for tg_id in tg_ids])
+        self.bulk_create(Employer, [
+            Employer(
+                tg_id=tg_id,
+                username=f'employer{tg_id}',
+                name=f'Company {tg_id[-6:]}',
+                phone=f'+972{tg_id[-9:]}',
+            ) for tg_id in tg_ids
+        ])
+
+        employer_ids = ids_by_tg_id(Employer)
+        return [employer_ids[tg_id] for tg_id in tg_ids]
+
+    def create_jobs(self, count, employers, areas):
+        if not count or not employers:
+            return []
+
+        # у немногих работодателей много вакансий, у большинства - одна-две
+        weights = [random.paretovariate(1.5) for _ in employers]
+        job_employers = random.choices(employers, weights=weights, k=count)
+        zones = [random_zones(areas) for _ in job_employers]
+
+        first_id = Job.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        self.bulk_create(Job, [
+            Job(
+                employer_id=employer_id,
+                min_salary=random_salary(55, 12, 30),
+                description='Уход за пожилым человеком, проживание',
+                description_rus='Уход за пожилым человеком, проживание',
+                permanent_work=random.random() < 0.6,
+                notifications=random.random() < 0.5,
+                is_active=random.random() < 0.85,
+                is_approved=random.choices((True, False, None), weights=(85, 5, 10))[0],
+                zone_mask=zones_mask(area.number for area in job_zones),
+            ) for employer_id, job_zones in zip(job_employers, zones)
+        ])
+
+        new_jobs = Job.objects.filter(id__gt=first_id, employer__tg_id__startswith=TG_ID_PREFIX)
+        new_jobs.filter(is_approved=True).update(approved_at=F('created_at'))
+
+        jobs = list(new_jobs.order_by('id').values_list('id', 'employer_id'))
+        self.bulk_create(Job.areas.through, [
+            Job.areas.through(job_id=job_id, area_id=area.id)
+            for (job_id, _), job_zones in zip(jobs, zones) for area in job_zones
+        ])
+
+        return jobs
+
+    def create_proposals(self, count, workers, employers, jobs):
+        if not count or not workers:
+            return
+
+        accepted = lambda: random.choices((True, False, None), weights=(30, 20, 50))[0]
+
+        if jobs:
+            worker_proposals = []
+            for _ in range(count // 2 + count % 2):
+                job_id, employer_id = random.choice(jobs)
+                worker_proposals.append(WorkerCooperationProposal(
+                    worker_id=random.choice(workers),
+                    employer_id=employer_id,
+                    job_id=job_id,
+                    is_accepted=accepted(),
+                    is_proceeded=True,
+                ))
+            self.bulk_create(WorkerCooperationProposal, worker_proposals)
+
+        if employers:
+            self.bulk_create(EmployerCooperationProposal, [
+                EmployerCooperationProposal(
+                    worker_id=random.choice(workers),
+                    employer_id=random.choice(employers),
+                    is_accepted=accepted(),
+                    is_proceeded=True,
+                ) for _ in range(count // 2)
+            ])
+
+    def create_reviews(self, count, workers, employers):
+        if not count or not workers or not employers:
+            return
+
+        approved = lambda: random.choices((True, False, None), weights=(80, 5, 15))[0]
+
+        self.bulk_create(WorkerReview, [
+            WorkerReview(
+                worker_id=random.choice(workers),
+                employer_id=random.choice(employers),
+                rate=random_rate(),
+                review='Все отлично',
+                review_heb='Все отлично',
+                is_approved=approved(),
+            ) for _ in range(count // 2 + count % 2)
+        ])
+        self.bulk_create(EmployerReview, [
+            EmployerReview(
+                worker_id=random.choice(workers),
+                employer_id=random.choice(employers),
+                rate=random_rate(),
+                review='Все отлично',
+                review_rus='Все отлично',
+                is_approved=approved(),
+            ) for _ in range(count // 2)
+        ])
+
+    def clear(self):
+        with transaction.atomic():
+            worker_ids = Worker.objects.filter(tg_id__startswith=TG_ID_PREFIX).values('id')
+            employer_ids = Employer.objects.filter(tg_id__startswith=TG_ID_PREFIX).values('id')
+
+            # отзывы при удалении пользователей не каскадируются (SET_NULL), удаляются отдельно
+            WorkerReview.objects.filter(worker_id__in=worker_ids).delete()
+            EmployerReview.objects.filter(employer_id__in=employer_ids).delete()
+            WorkerCooperationProposal.objects.filter(worker_id__in=worker_ids).delete()
+            EmployerCooperationProposal.objects.filter(employer_id__in=employer_ids).delete()
+            Job.areas.through.objects.filter(job__employer_id__in=employer_ids).delete()
+            Worker.areas.through.objects.filter(worker_id__in=worker_ids).delete()
+            Job.objects.filter(employer_id__in=employer_ids).delete()
+            Worker.objects.filter(tg_id__startswith=TG_ID_PREFIX).delete()
+            Employer.objects.filter(tg_id__startswith=TG_ID_PREFIX).delete()
+            deleted, _ = TGUser.objects.filter(tg_id__startswith=TG_ID_PREFIX).delete()
+
+        print(f'cleared {deleted} synthetic users')
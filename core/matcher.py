@@ -0,0 +1,428 @@
+import time
+import uuid
+import asyncio
+import logging
+import datetime
+import threading
+
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.db import connections, transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from redis import Redis as SyncRedis, RedisError
+from redis.asyncio import Redis
+
+from config import MATCHER_REFRESH_SECONDS, REDIS_HOST, REDIS_PORT, REDIS_DB
+from core.models import Worker, Job, Employer, zones_text, zone_mask_updated
+from core.listings import ListingRow
+
+
+# подбор "работники под вакансию" и "вакансии под работника" по снимку в памяти:
+# колонки numpy-массивов (id, зарплата, битовая маска зон, тип работы, флаги),
+# подходящие строки выбираются векторной маской без запросов к БД.
+# снимок грузится в фоне при первом обращении (до этого вызывающий идет в БД),
+# обновляется построчно сигналами этого процесса, сообщениями об изменениях из других
+# процессов (админка, celery) через redis и целиком раз в MATCHER_REFRESH_SECONDS
+WORKER_COLUMNS = {
+    'id': np.int64,
+    'tg_id': object,
+    'created_at': np.float64,
+    'min_salary': np.int64,
+    'zones': np.uint64,
+    'permanent': np.bool_,
+    'approved': np.bool_,
+    'searching': np.bool_,
+    'notifications': np.bool_,
+    'digest': np.bool_,
+    'alive': np.bool_,
+}
+
+JOB_COLUMNS = {
+    'id': np.int64,
+    'employer_id': np.int64,
+    'created_at': np.float64,
+    'approved_at': np.float64,
+    'min_salary': np.int64,
+    'zones': np.uint64,
+    'permanent': np.bool_,
+    'approved': np.bool_,
+    'active': np.bool_,
+    'notifications': np.bool_,
+    'alive': np.bool_,
+}
+
+def timestamp(value):
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    return value.timestamp()
+
+
+class Table:
+    """Колонки одной модели в numpy-массивах с запасом по длине и индекс id -> номер строки.
+
+    Удаленные строки не вырезаются, а помечаются alive=False до следующей полной перезагрузки.
+    """
+
+    def __init__(self, columns, rows=()):
+        self.columns = columns
+        self.size = len(rows)
+        capacity = max(16, self.size * 2)
+        self.arrays = {name: np.zeros(capacity, dtype=dtype) for name, dtype in columns.items()}
+
+        for num, row in enumerate(rows):
+            for name, value in row.items():
+                self.arrays[name][num] = value
+
+        self.index = {int(obj_id): num for num, obj_id in enumerate(self.arrays['id'][:self.size])}
+
+    def __getattr__(self, name):
+        arrays = self.__dict__.get('arrays', {})
+        if name in arrays:
+            return arrays[name][:self.size]
+        raise AttributeError(name)
+
+    def upsert(self, row):
+        num = self.index.get(row['id'])
+        if num is None:
+            num = self.size
+            if num == len(self.arrays['id']):
+                self.arrays = {name: np.resize(array, num * 2) for name, array in self.arrays.items()}
+            self.size += 1
+            self.index[row['id']] = num
+
+        for name, value in row.items():
+            self.arrays[name][num] = value
+
+    def remove(self, obj_id):
+        num = self.index.get(obj_id)
+        if num is not None:
+            self.arrays['alive'][num] = False
+
+    def get(self, obj_id):
+        num = self.index.get(obj_id)
+        if num is not None and self.arrays['alive'][num]:
+            return num
+
+    def newest_first(self, mask):
+        """Номера строк под маской в порядке -created_at, -id (как ordering моделей)."""
+        rows = np.flatnonzero(mask)
+        order = np.lexsort((-self.id[rows], -self.created_at[rows]))
+        return rows[order]
+
+
+def worker_row(worker):
+    return {
+        'id': worker.id,
+        'tg_id': worker.tg_id,
+        'created_at': timestamp(worker.created_at),
+        'min_salary': worker.min_salary,
+        'zones': worker.zone_mask,
+        'permanent': worker.permanent_work,
+        'approved': worker.is_approved is True,
+        'searching': worker.is_searching,
+        'notifications': worker.notifications,
+        'digest': worker.notifications_digest,
+        'alive': True,
+    }
+
+
+def job_row(job):
+    return {
+        'id': job.id,
+        'employer_id': job.employer_id,
+        'created_at': timestamp(job.created_at),
+        'approved_at': timestamp(job.approved_at) if job.approved_at else 0,
+        'min_salary': job.min_salary,
+        'zones': job.zone_mask,
+        'permanent': job.permanent_work,
+        'approved': job.is_approved is True,
+        'active': job.is_active,
+        'notifications': job.notifications,
+        'alive': True,
+    }
+
+
+WORKER_FIELDS = ('id', 'tg_id', 'created_at', 'min_salary', 'zone_mask', 'permanent_work', 'is_approved', 'is_searching',
+                 'notifications', 'notifications_digest')
+JOB_FIELDS = ('id', 'employer_id', 'created_at', 'approved_at', 'min_salary', 'zone_mask', 'permanent_work', 'is_approved', 'is_active', 'notifications')
+
+
+class Matcher:
+    def __init__(self):
+        self.workers = None
+        self.jobs = None
+        self.worker_ids = {}
+        self.employers = {}
+        self.loaded_at = 0
+        self._lock = threading.Lock()
+        self._loading = None
+        # изменения, пришедшие во время полной загрузки, доприменяются после нее
+        self._pending = None
+
+    @property
+    def ready(self):
+        return self.workers is not None
+
+    def load(self):
+        with self._lock:
+            self._pending = {'workers': set(), 'jobs': set()}
+
+        try:
+            workers = Table(WORKER_COLUMNS, [worker_row(worker) for worker in Worker.objects.only(*WORKER_FIELDS)])
+            jobs = Table(JOB_COLUMNS, [job_row(job) for job in Job.objects.only(*JOB_FIELDS)])
+            worker_ids = dict(zip(workers.tg_id.tolist(), workers.id.tolist()))
+            employers = dict(Employer.objects.values_list('tg_id', 'id'))
+
+            with self._lock:
+                pending, self._pending = self._pending, None
+                self.workers, self.jobs = workers, jobs
+                self.worker_ids, self.employers = worker_ids, employers
+                self.loaded_at = time.monotonic()
+
+            # строки, сохраненные во время загрузки, могли в нее не попасть
+            for name, ids in pending.items():
+                if ids:
+                    self.reload(name, ids)
+        finally:
+            self._pending = None
+
+    def _load_in_thread(self):
+        try:
+            self.load()
+        finally:
+            connections.close_all()
+
+    def refresh(self, name, objects):
+        """Обновляет строки по сохраненным объектам (без запросов к БД)."""
+        ids = {obj.id for obj in objects}
+        with self._lock:
+            if self._pending is not None:
+                self._pending[name].update(ids)
+            if not self.ready:
+                return
+
+        rows = [(worker_row if name == 'workers' else job_row)(obj) for obj in objects]
+        with self._lock:
+            table = getattr(self, name)
+            for row in rows:
+                table.upsert(row)
+                if name == 'workers':
+                    self.worker_ids[row['tg_id']] = row['id']
+
+    def reload(self, name, ids):
+        """Перечитывает строки из БД; строки, которых в БД больше нет, помечаются удаленными."""
+        model, fields = (Worker, WORKER_FIELDS) if name == 'workers' else (Job, JOB_FIELDS)
+        objects = list(model.objects.filter(id__in=ids).only(*fields))
+        self.refresh(name, objects)
+        for obj_id in set(ids) - {obj.id for obj in objects}:
+            self.remove(name, obj_id)
+
+    def remove(self, name, obj_id):
+        with self._lock:
+            if self.ready:
+                getattr(self, name).remove(obj_id)
+
+    def add_employer(self, tg_id, employer_id):
+        with self._lock:
+            self.employers[tg_id] = employer_id
+
+    def schedule_load(self):
+        stale = time.monotonic() - self.loaded_at > MATCHER_REFRESH_SECONDS
+        if (not self.ready or stale) and self._loading is None:
+            self._loading = asyncio.create_task(self._load())
+
+    async def _load(self):
+        try:
+            # полная загрузка идет в отдельном потоке со своим соединением,
+            # чтобы не занимать поток, в котором выполняются запросы хендлеров
+            await sync_to_async(self._load_in_thread, thread_sensitive=False)()
+        finally:
+            self._loading = None
+
+    async def warm(self):
+        self.schedule_load()
+        if self._loading is not None:
+            await self._loading
+
+    def _rows(self, table, rows):
+        return [ListingRow(int(table.id[num]), int(table.min_salary[num]), zones_text(table.zones[num])) for num in rows]
+
+    def _workers_mask(self, min_salary, zones, permanent):
+        workers = self.workers
+        return (
+            workers.alive &
+            workers.approved &
+            workers.searching &
+            (workers.min_salary <= min_salary) &
+            ((workers.zones & np.uint64(zones)) != 0) &
+            (workers.permanent == permanent)
+            )
+
+    def jobs_for_worker(self, tg_id, since=None):
+        with self._lock:
+            num = self.workers.get(self.worker_ids.get(str(tg_id)))
+            if num is None:
+                return None
+
+            workers, jobs = self.workers, self.jobs
+            mask = (
+                jobs.alive &
+                jobs.active &
+                jobs.approved &
+                ((jobs.zones & workers.zones[num]) != 0) &
+                (jobs.min_salary >= workers.min_salary[num]) &
+                (jobs.permanent == workers.permanent[num])
+                )
+            if since:
+                approved_at = timestamp(since[0])
+                mask &= (jobs.approved_at > approved_at) | ((jobs.approved_at == approved_at) & (jobs.id > since[1]))
+
+            return self._rows(jobs, jobs.newest_first(mask))
+
+    def workers_for_job(self, min_salary, zones, permanent, notifications=False, digest=None):
+        with self._lock:
+            mask = self._workers_mask(min_salary, zones, permanent)
+            if notifications:
+                mask &= self.workers.notifications
+            if digest is not None:
+                mask &= self.workers.digest == digest
+
+            return self.workers.tg_id[self.workers.newest_first(mask)].tolist()
+
+    def workers_for_employer(self, tg_id):
+        with self._lock:
+            employer_id = self.employers.get(str(tg_id))
+            if employer_id is None:
+                return None
+
+            jobs = self.jobs
+            employer_jobs = jobs.newest_first(jobs.alive & jobs.active & jobs.approved & (jobs.employer_id == employer_id))
+
+            # порядок как в выдаче по БД: работники первой вакансии, затем новые из следующих
+            rows, seen = [], set()
+            for num in employer_jobs:
+                mask = self._workers_mask(jobs.min_salary[num], jobs.zones[num], jobs.permanent[num])
+                for row in self.workers.newest_first(mask):
+                    if row not in seen:
+                        seen.add(row)
+                        rows.append(row)
+
+            return self._rows(self.workers, rows)
+
+matcher = Matcher()
+
+
+async def _answer(method, *args, **kwargs):
+    matcher.schedule_load()
+    if not matcher.ready:
+        return None
+
+    return method(*args, **kwargs)
+
+
+async def suitable_jobs(tg_id, since=None):
+    """Вакансии под работника (ListingRow, новые первыми) или None, если снимок еще не готов."""
+    return await _answer(matcher.jobs_for_worker, tg_id, since)
+
+
+async def suitable_workers(employer_tg_id):
+    """Работники под активные вакансии работодателя (ListingRow) или None, если снимок еще не готов."""
+    return await _answer(matcher.workers_for_employer, employer_tg_id)
+
+
+async def workers_for_job(job, notifications=False, digest=None):
+    """tg_id работников под вакансию или None, если снимок еще не готов.
+
+    digest=True/False оставляет только тех, кто получает уведомления сводкой/сразу.
+    """
+    return await _answer(matcher.workers_for_job, job.min_salary, job.zone_mask, job.permanent_work, notifications, digest)
+
+
+# изменения строк рассылаются по redis, чтобы снимок бота видел правки из админки и celery;
+# свои сообщения процесс пропускает - его строки уже обновлены сигналами
+CHANGES_CHANNEL = 'matcher:changes'
+_process = uuid.uuid4().hex
+_publisher = {'redis': None, 'retry_at': 0}
+
+
+def publish_change(name, obj_id):
+    if time.monotonic() < _publisher['retry_at']:
+        return
+
+    try:
+        if _publisher['redis'] is None:
+            _publisher['redis'] = SyncRedis(host=REDIS_HOST, port=REDIS_PORT, db=REDIS_DB, socket_timeout=1)
+        _publisher['redis'].publish(CHANGES_CHANNEL, f'{_process}:{name}:{obj_id}')
+    except RedisError:
+        # пока redis недоступен, сохранения не ждут его таймаутов; изменения доберет полная перезагрузка
+        _publisher['retry_at'] = time.monotonic() + 60
+        logging.exception('Matcher change publishing failed')
+
+
+def changed(name, instance):
+    matcher.refresh(name, [instance])
+    publish_change(name, instance.id)
+
+
+def removed(name, obj_id):
+    matcher.remove(name, obj_id)
+    publish_change(name, obj_id)
+
+
+async def listen_changes(redis: Redis):
+    """Перечитывает строки снимка, измененные в других процессах."""
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(CHANGES_CHANNEL)
+                async for message in pubsub.listen():
+                    if message['type'] != 'message':
+                        continue
+
+                    process, name, obj_id = message['data'].split(':')
+                    if process != _process:
+                        await sync_to_async(matcher.reload)(name, [int(obj_id)])
+        except Exception:
+            logging.exception('Matcher changes listening failed')
+            # сообщения, пропущенные без подписки, доберет полная перезагрузка
+            matcher.loaded_at = 0
+
+        await asyncio.sleep(5)
+
+
+# строка обновляется после коммита: к этому моменту zone_mask уже пересчитана по m2m,
+# а удаление, откаченное вместе с транзакцией, не прячет строку
+@receiver(post_save, sender=Worker)
+def refresh_worker(sender, instance, **kwargs):
+    transaction.on_commit(lambda: changed('workers', instance))
+
+
+@receiver(post_save, sender=Job)
+def refresh_job(sender, instance, **kwargs):
+    transaction.on_commit(lambda: changed('jobs', instance))
+
+
+@receiver(zone_mask_updated, sender=Worker)
+@receiver(zone_mask_updated, sender=Job)
+def refresh_zones(sender, instance, **kwargs):
+    name = 'workers' if sender is Worker else 'jobs'
+    transaction.on_commit(lambda: changed(name, instance))
+
+
+@receiver(post_delete, sender=Worker)
+def remove_worker(sender, instance, **kwargs):
+    obj_id = instance.id
+    transaction.on_commit(lambda: removed('workers', obj_id))
+
+
+@receiver(post_delete, sender=Job)
+def remove_job(sender, instance, **kwargs):
+    obj_id = instance.id
+    transaction.on_commit(lambda: removed('jobs', obj_id))
+
+
+@receiver(post_save, sender=Employer)
+def add_employer(sender, instance, created, **kwargs):
+    if created:
+        matcher.add_employer(instance.tg_id, instance.id)
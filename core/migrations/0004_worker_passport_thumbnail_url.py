@@ -0,0 +1,18 @@
+# Generated by Django 4.2 on 2026-10-19 14:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_worker_selfie'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='worker',
+            name='passport_thumbnail_url',
+            field=models.CharField(blank=True, editable=False, max_length=500, null=True, verbose_name='Миниатюра паспорта'),
+        ),
+    ]
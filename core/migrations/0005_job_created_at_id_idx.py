@@ -0,0 +1,17 @@
+# Generated by Django 4.2 on 2026-10-19 14:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0004_worker_passport_thumbnail_url'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['created_at', 'id'], name='job_created_at_id_idx'),
+        ),
+    ]
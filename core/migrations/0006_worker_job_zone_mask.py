@@ -0,0 +1,42 @@
+# Generated by Django 4.2 on 2026-10-19 18:20
+
+from django.db import migrations, models
+
+
+def fill_zone_masks(apps, schema_editor):
+    # записи с одинаковым набором зон обновляются одним запросом
+    for model_name, owner_field in (('Worker', 'worker_id'), ('Job', 'job_id')):
+        model = apps.get_model('core', model_name)
+
+        masks = {}
+        for owner_id, number in model.areas.through.objects.values_list(owner_field, 'area__number'):
+            masks[owner_id] = masks.get(owner_id, 0) | 1 << (number - 1)
+
+        owners_by_mask = {}
+        for owner_id, mask in masks.items():
+            owners_by_mask.setdefault(mask, []).append(owner_id)
+
+        for mask, owner_ids in owners_by_mask.items():
+            for start in range(0, len(owner_ids), 1000):
+                model.objects.filter(id__in=owner_ids[start:start + 1000]).update(zone_mask=mask)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_job_created_at_id_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='zone_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Маска зон'),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='zone_mask',
+            field=models.BigIntegerField(default=0, editable=False, verbose_name='Маска зон'),
+        ),
+        migrations.RunPython(fill_zone_masks, migrations.RunPython.noop),
+    ]
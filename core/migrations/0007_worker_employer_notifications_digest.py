@@ -0,0 +1,23 @@
+# Generated by Django 4.2 on 2026-10-19 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0006_worker_job_zone_mask'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='employer',
+            name='notifications_digest',
+            field=models.BooleanField(default=False, verbose_name='Уведомления сводкой?'),
+        ),
+        migrations.AddField(
+            model_name='worker',
+            name='notifications_digest',
+            field=models.BooleanField(default=False, verbose_name='Уведомления сводкой?'),
+        ),
+    ]
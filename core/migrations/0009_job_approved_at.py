@@ -0,0 +1,30 @@
+# Generated by Django 4.2 on 2026-10-19 21:10
+
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_approved_at(apps, schema_editor):
+    # для уже одобренных вакансий время одобрения неизвестно, берется время создания
+    Job = apps.get_model('core', 'Job')
+    Job.objects.filter(is_approved=True).update(approved_at=F('created_at'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_tguser_unreachable_since'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='approved_at',
+            field=models.DateTimeField(blank=True, default=None, null=True, verbose_name='Дата одобрения'),
+        ),
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['approved_at', 'id'], name='job_approved_at_id_idx'),
+        ),
+        migrations.RunPython(fill_approved_at, migrations.RunPython.noop),
+    ]
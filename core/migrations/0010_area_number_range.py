@@ -0,0 +1,19 @@
+# Generated by Django 4.2 on 2026-10-19 15:48
+
+import django.core.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_job_approved_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='area',
+            name='number',
+            field=models.PositiveIntegerField(validators=[django.core.validators.MinValueValidator(1), django.core.validators.MaxValueValidator(63)], verbose_name='Номер территориальной зоны'),
+        ),
+    ]
@@ -1,11 +1,12 @@
 import datetime
 
+from django.core.validators import MinValueValidator, MaxValueValidator
 from django.db import models
-from django.db.models import Min, Max, Q, Avg
+from django.db.models import Min, Max, Q, Avg, F
+from django.db.models.lookups import GreaterThan
 from django.utils.html import format_html
-from django.db.models.signals import post_save
-from django.dispatch import receiver
-from easy_thumbnails.files import get_thumbnailer
+from django.db.models.signals import post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver, Signal
 from filer.fields.image import FilerImageField
 
 
@@ -14,6 +15,34 @@ TARGETS = (
     ('2', 'Работодатель',),
 )
 
+# зоны работника/вакансии дублируются битовой маской (бит number - 1) в поле zone_mask,
+# чтобы подбор сравнивал зоны одним условием по таблице, без join'а с m2m и DISTINCT
+MAX_ZONE = 63
+
+# zone_mask пересчитана и записана в БД (update, без post_save)
+zone_mask_updated = Signal()
+
+
+def zones_mask(numbers):
+    mask = 0
+    for number in numbers:
+        number = int(number)
+        if not 1 <= number <= MAX_ZONE:
+            raise ValueError(f'Zone {number} does not fit into zone mask')
+        mask |= 1 << (number - 1)
+
+    return mask
+
+
+def zones_text(mask):
+    mask = int(mask)
+    return ', '.join(str(bit + 1) for bit in range(MAX_ZONE) if mask >> bit & 1)
+
+
+def overlapping_zones(mask, field='zone_mask'):
+    """Условие для filter(): есть хотя бы одна зона из маски."""
+    return GreaterThan(F(field).bitand(mask), 0)
+
 
 class Text(models.Model):
     slug = models.CharField(verbose_name='Идентификатор', max_length=100, unique=True)
@@ -56,6 +85,7 @@ class Button(models.Model):
 class TGUser(models.Model):
     tg_id = models.CharField(verbose_name='Телеграм id', max_length=100, unique=True)
     target = models.CharField(verbose_name='Тип пользователя', choices=TARGETS, max_length=10)
+    unreachable_since = models.DateTimeField(verbose_name='Недоступен с', null=True, blank=True, default=None)
     created_at = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
 
     class Meta:
@@ -68,7 +98,8 @@ class TGUser(models.Model):
 
 
 class Area(models.Model):
-    number = models.PositiveIntegerField(verbose_name='Номер территориальной зоны')
+    number = models.PositiveIntegerField(verbose_name='Номер территориальной зоны',
+                                         validators=[MinValueValidator(1), MaxValueValidator(MAX_ZONE)])
 
     def __str__(self):
         return str(self.number)
@@ -81,13 +112,16 @@ class Worker(models.Model):
     phone = models.CharField(verbose_name='Номер телефона', max_length=25, null=True, blank=True)
     passport_photo = FilerImageField(verbose_name='Фото паспорта', on_delete=models.SET_NULL, null=True, blank=True)
     passport_photo_tg_id = models.CharField(verbose_name='TG id паспорта', max_length=200, null=True, blank=True)
+    passport_thumbnail_url = models.CharField(verbose_name='Миниатюра паспорта', max_length=500, null=True, blank=True, editable=False)
     selfie = models.CharField(verbose_name='TG id селфи', max_length=200, null=True, blank=True)
     areas = models.ManyToManyField(Area, verbose_name='зоны', related_name='workers', blank=True)
+    zone_mask = models.BigIntegerField(verbose_name='Маска зон', default=0, editable=False)
     permanent_work = models.BooleanField(default=True)
     about = models.TextField(verbose_name='О себе', blank=True, null=True)
     about_heb = models.TextField(verbose_name='О себе (иврит)', blank=True, null=True, default=None)
     min_salary = models.PositiveIntegerField(verbose_name='Зарплата (от) ₪', default=0)
     notifications = models.BooleanField(verbose_name='Подписан на уведомления?', default=False)
+    notifications_digest = models.BooleanField(verbose_name='Уведомления сводкой?', default=False)
     is_searching = models.BooleanField(verbose_name='В поисках работы?', default=True)
     is_approved = models.BooleanField(verbose_name='Аккаунт подтвержден?', default=None, null=True, blank=True)
     created_at = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
@@ -105,8 +139,11 @@ class Worker(models.Model):
 
     def get_thumbnail(self):
         image = '-'
-        if self.passport_photo:
-            image = format_html('<img src="{0}"/>', get_thumbnailer(self.passport_photo)['passport_thumbnail'].url)
+        if self.passport_thumbnail_url:
+            image = format_html('<img src="{0}"/>', self.passport_thumbnail_url)
+        elif self.passport_photo_id:
+            # миниатюра генерируется в фоне после сохранения фото (или командой generate_thumbnails)
+            image = '⏳'
         return image
     get_thumbnail.allow_tags = True
     get_thumbnail.short_description = u'Паспорт'
@@ -139,6 +176,9 @@ class Worker(models.Model):
     
     @property
     def readable_notifications_status(self):
+        if self.notifications is True and self.notifications_digest is True:
+            return 'включены (сводкой)'
+
         if self.notifications is True:
             return 'включены'
 
@@ -182,6 +222,7 @@ class Employer(models.Model):
     username = models.CharField(verbose_name='Ник телеграм', max_length=100, null=True, blank=True)
     name = models.CharField(verbose_name='Имя/название компании', default='Company', max_length=150)
     phone = models.CharField(verbose_name='Номер телефона', max_length=25, null=True, blank=True)
+    notifications_digest = models.BooleanField(verbose_name='Уведомления сводкой?', default=False)
     created_at = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
 
     class Meta:
@@ -255,11 +296,13 @@ class Job(models.Model):
     min_salary = models.PositiveIntegerField(verbose_name='Зарплата (от) ₪', default=0)
     description = models.TextField(verbose_name='Описание', blank=True, null=True)
     areas = models.ManyToManyField(Area, verbose_name='зоны', related_name='jobs', blank=True)
+    zone_mask = models.BigIntegerField(verbose_name='Маска зон', default=0, editable=False)
     permanent_work = models.BooleanField(default=True)
     description_rus = models.TextField(verbose_name='Описание (русский)', blank=True, null=True, default=None)
     notifications = models.BooleanField(verbose_name='Подписан на уведомления?', default=False)
     is_active = models.BooleanField(default=True)
     is_approved = models.BooleanField(default=None, null=True)
+    approved_at = models.DateTimeField(verbose_name='Дата одобрения', blank=True, null=True, default=None)
     created_at = models.DateTimeField(verbose_name='Дата создания', auto_now_add=True)
     updated_at = models.DateTimeField(verbose_name='Дата обновления', auto_now=True, null=True)
 
@@ -267,6 +310,10 @@ class Job(models.Model):
         verbose_name = 'вакансия'
         verbose_name_plural = 'вакансии'
         ordering = ('-created_at',)
+        indexes = [
+            models.Index(fields=('created_at', 'id'), name='job_created_at_id_idx'),
+            models.Index(fields=('approved_at', 'id'), name='job_approved_at_id_idx'),
+        ]
         
     def __str__(self):     
         return f'{self.min_salary} ₪: {self.readable_zones}'
@@ -482,3 +529,52 @@ class EmployerCooperationProposal(models.Model):
 
         if self.is_accepted is True:
             return '✅ התקבל (המנהל ייצור איתך קשר)'
+
+
+def update_zone_mask(obj):
+    obj.zone_mask = zones_mask(obj.areas.values_list('number', flat=True))
+    type(obj).objects.filter(pk=obj.pk).update(zone_mask=obj.zone_mask)
+    zone_mask_updated.send(sender=type(obj), instance=obj)
+
+
+def area_owners(area):
+    return list(Worker.objects.filter(areas=area)) + list(Job.objects.filter(areas=area))
+
+
+@receiver(m2m_changed, sender=Worker.areas.through)
+@receiver(m2m_changed, sender=Job.areas.through)
+def sync_zone_mask(sender, instance, action, reverse, model, pk_set, **kwargs):
+    """Пересчитывает zone_mask после любого изменения зон, в том числе из админки."""
+    if not reverse:
+        if action in ('post_add', 'post_remove', 'post_clear'):
+            update_zone_mask(instance)
+        return
+
+    # изменение со стороны зоны (area.workers.add(...) и т.п.): пересчет у всех затронутых
+    if action == 'pre_clear':
+        instance._zone_mask_owners = list(model.objects.filter(areas=instance))
+    elif action == 'post_clear':
+        for owner in instance.__dict__.pop('_zone_mask_owners', []):
+            update_zone_mask(owner)
+    elif action in ('post_add', 'post_remove'):
+        for owner in model.objects.filter(pk__in=pk_set):
+            update_zone_mask(owner)
+
+
+# удаление зоны снимает связи без m2m_changed, смена номера их не трогает - маски пересчитываются здесь
+@receiver(post_save, sender=Area)
+def renumber_zone(sender, instance, created, **kwargs):
+    if not created:
+        for owner in area_owners(instance):
+            update_zone_mask(owner)
+
+
+@receiver(pre_delete, sender=Area)
+def remember_zone_owners(sender, instance, **kwargs):
+    instance._zone_mask_owners = area_owners(instance)
+
+
+@receiver(post_delete, sender=Area)
+def remove_zone(sender, instance, **kwargs):
+    for owner in instance.__dict__.pop('_zone_mask_owners', []):
+        update_zone_mask(owner)
@@ -0,0 +1,61 @@
+import time
+from contextvars import ContextVar
+
+from django.db import connections
+
+from config import DB_REPLICA_STICKY_SECONDS
+
+
+REPLICA = 'replica'
+
+# пользователь, чей апдейт сейчас обрабатывает бот; вне апдейтов (админка, celery) - None
+current_user: ContextVar[str] = ContextVar('current_user', default=None)
+
+# tg_id -> время, до которого чтения пользователя идут в основную БД
+_sticky = {}
+
+
+def stick(user_id):
+    now = time.monotonic()
+    if len(_sticky) > 10000:
+        for key in [key for key, until in _sticky.items() if until <= now]:
+            del _sticky[key]
+
+    _sticky[user_id] = now + DB_REPLICA_STICKY_SECONDS
+
+
+def is_sticky(user_id):
+    return _sticky.get(user_id, 0) > time.monotonic()
+
+
+class ReplicaRouter:
+    """Чтения бота идут в реплику (DATABASES['replica']), записи и все остальное - в основную БД.
+
+    В реплику уходят только запросы внутри апдейта пользователя. После записи пользователь
+    на DB_REPLICA_STICKY_SECONDS читает из основной БД, чтобы видеть свои изменения, пока
+    реплика догоняет. Чтения внутри транзакции тоже идут в основную БД.
+    Без настроенной реплики роутер ничего не меняет.
+    """
+
+    def db_for_read(self, model, **hints):
+        if REPLICA not in connections.databases:
+            return None
+
+        user_id = current_user.get()
+        if user_id is None or is_sticky(user_id) or connections['default'].in_atomic_block:
+            return 'default'
+
+        return REPLICA
+
+    def db_for_write(self, model, **hints):
+        user_id = current_user.get()
+        if user_id is not None:
+            stick(user_id)
+
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA
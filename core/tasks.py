@@ -0,0 +1,41 @@
+import os
+
+from celery import shared_task
+from django.core.files import File
+from easy_thumbnails.files import get_thumbnailer
+from filer.models import Image, Folder
+
+from core.models import Worker
+
+
+@shared_task
+def save_passport_photo(worker_id, file_path, original_filename):
+    """Сохранение скачанного фото паспорта в filer и привязка к работнику."""
+    try:
+        if Worker.objects.filter(id=worker_id).exists():
+            folder, _ = Folder.objects.get_or_create(name='Паспорта')
+            passport_photo = Image(
+                folder=folder,
+                original_filename=original_filename,
+            )
+            with open(file_path, 'rb') as image:
+                passport_photo.file.save(original_filename, File(image), save=False)
+            passport_photo.save()
+
+            Worker.objects.filter(id=worker_id).update(
+                passport_photo=passport_photo,
+                passport_thumbnail_url=get_thumbnailer(passport_photo)['passport_thumbnail'].url,
+            )
+    finally:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
+@shared_task
+def generate_passport_thumbnail(worker_id):
+    """Генерация миниатюры паспорта для списка работников в админке."""
+    worker = Worker.objects.filter(id=worker_id).select_related('passport_photo').first()
+    if worker and worker.passport_photo:
+        Worker.objects.filter(id=worker_id).update(
+            passport_thumbnail_url=get_thumbnailer(worker.passport_photo)['passport_thumbnail'].url,
+        )
@@ -1,3 +1,648 @@
-from django.test import TestCase
+import io
+import os
+import time
+import asyncio
+import tempfile
+from contextlib import contextmanager, redirect_stdout
+from unittest import mock
 
-# Create your tests here.
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import SendMessage
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection, connections, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from bot import create_dispatcher
+from config import ADMIN_CHAT_ID, PER_PAGE
+from core import catalogue, listings, delivery, routers
+from core.catalogue import get_areas, get_button, get_text
+from core.listings import get_listing
+from core.delivery import unreachable_chats
+from core.job_feed import newer_than
+from core.matcher import Matcher
+from core.management.commands.seed_scale import synthetic_tg_id
+from core.models import (TGUser, Area, Worker, Employer, Job,
+                         WorkerCooperationProposal, EmployerCooperationProposal,
+                         WorkerReview, EmployerReview)
+from keyboards import keyboards
+from channel_posting import ChannelPost, ChannelPoster
+from notifications_center import job_recipients
+from benchmarks.fake_api import FakeBotAPI, FakeSession
+from bot_session import api_server
+from handlers.worker_profile import store_passport_photo
+from benchmarks.journeys import Replayer, full_journey, journey_user_ids, translation_functions, fake_translate
+
+
+# наибольшее число запросов к БД на одно построение клавиатуры / один апдейт;
+# при оптимизациях значения уменьшаются, чтобы N+1 не вернулись незаметно
+KEYBOARD_BUDGETS = {
+    'admin_worker_keyboard': 0,
+    'more_workers_channel_keyboard': 1,
+    'more_jobs_channel_keyboard': 1,
+    'choose_target_keyboard': 2,
+    'request_phone_keyboard': 1,
+    'zones_keyboard': 0,
+    'work_type_keyboard': 2,
+    'worker_notification_keyboard': 2,
+    'worker_profile_confirmation_keyboard': 2,
+    'worker_profile_keyboard': 5,
+    'worker_change_cv_keyboard': 1,
+    'worker_to_main_menu_keyboard': 1,
+    'worker_main_menu': 4,
+    'worker_jobs_menu_keyboard': 3,
+    'worker_proposals_menu_keyboard': 3,
+    'worker_reviews_menu_keyboard': 3,
+    'worker_jobs_list_keyboard(all-jobs)': 0,
+    'worker_jobs_list_keyboard(suitable-jobs)': 0,
+    'worker_jobs_list_keyboard(new-jobs)': 0,
+    'worker_job_details_keyboard': 8,
+    'worker_job_detail_redirect': 2,
+    'worker_job_detail_back': 3,
+    'worker_proposals_list_keyboard(outbox)': 3,
+    'worker_proposals_list_keyboard(inbox)': 3,
+    'worker_outbox_proposal_details_keyboard': 6,
+    'worker_inbox_proposal_details_keyboard': 9,
+    'worker_reviews_list_keyboard(outbox)': 3,
+    'worker_reviews_list_keyboard(inbox)': 3,
+    'employer_main_menu': 5,
+    'employer_jobs_menu_keyboard': 5,
+    'employer_workers_menu_keyboard': 3,
+    'employer_jobs_list_keyboard(jobs-active)': 9,
+    'employer_jobs_edit_keyboard': 6,
+    'employer_workers_list_keyboard(workers-all)': 0,
+    'employer_workers_list_keyboard(workers-suitable)': 0,
+    'employer_worker_details_keyboard': 7,
+    'employer_proposals_list_keyboard(inbox)': 3,
+    'employer_proposals_list_keyboard(outbox)': 3,
+    'employer_outbox_proposal_details_keyboard': 5,
+    'employer_inbox_proposal_details_keyboard': 7,
+    'employer_reviews_list_keyboard(inbox)': 3,
+    'employer_reviews_list_keyboard(outbox)': 3,
+}
+
+HANDLER_BUDGETS = {
+    'start': 5,
+    'choose_target': 4,
+    'employer_phone': 3,
+    'employer_name': 11,
+    'employer_jobs_menu': 6,
+    'job_add': 1,
+    'zone_toggle': 0,
+    'zones_confirm': 1,
+    'job_salary': 3,
+    'job_description': 5,
+    'work_type': 3,
+    'job_notifications': 9,
+    'job_confirm': 18,
+    'admin_job_approve': 10,
+    'worker_name': 4,
+    'worker_phone': 3,
+    'passport_photo': 3,
+    'selfie': 5,
+    'worker_about': 3,
+    'worker_salary': 5,
+    'worker_notifications': 10,
+    'worker_confirm': 30,
+    'admin_worker_approve': 9,
+    'worker_jobs_menu': 5,
+    'jobs_page': 3,
+    'new_jobs_feed': 3,
+    'job_details': 19,
+    'proposal_make': 16,
+    'employer_workers_menu': 4,
+    'workers_page': 4,
+    'worker_details': 15,
+    'employer_inbox': 4,
+    'proposal_details': 28,
+    'proposal_accept': 40,
+    'review_add': 2,
+    'review_rate': 4,
+    'review_text': 9,
+    'review_confirm': 7,
+    'admin_review_approve': 11,
+}
+
+# допустимое время, мс; на медленных машинах увеличивается через BUDGET_TIME_FACTOR
+BUDGET_TIME_FACTOR = float(os.getenv('BUDGET_TIME_FACTOR', 1))
+KEYBOARD_MAX_MS = 200 * BUDGET_TIME_FACTOR
+HANDLER_MAX_MS = 1000 * BUDGET_TIME_FACTOR
+
+
+def seed_budget_data():
+    """Набор данных, которого хватает на несколько страниц в каждом списке."""
+    rows = PER_PAGE * 3
+    areas = list(Area.objects.all())
+
+    employer = Employer.objects.create(tg_id=synthetic_tg_id(0), name='Budget', phone='972000000')
+    worker = Worker.objects.create(tg_id=synthetic_tg_id(1), name='Budget', phone='79000000',
+                                   is_approved=True, min_salary=10, selfie='selfie')
+    worker.areas.set(areas)
+    TGUser.objects.bulk_create([
+        TGUser(tg_id=employer.tg_id, target='2'),
+        TGUser(tg_id=worker.tg_id, target='1'),
+    ])
+
+    jobs = []
+    for num in range(rows):
+        job = Job.objects.create(employer=employer, min_salary=50 + num, description='-',
+                                 description_rus='-', is_approved=True, approved_at=timezone.now())
+        job.areas.set(areas)
+        jobs.append(job)
+
+        other_worker = Worker.objects.create(tg_id=synthetic_tg_id(100 + num), name='Budget',
+                                             is_approved=True, min_salary=10 + num)
+        other_worker.areas.set(areas)
+
+    worker_proposal = WorkerCooperationProposal.objects.create(worker=worker, employer=employer,
+                                                               job=jobs[0], is_accepted=True)
+    employer_proposal = EmployerCooperationProposal.objects.create(worker=worker, employer=employer,
+                                                                   is_accepted=True)
+    WorkerReview.objects.create(worker=worker, employer=employer, rate=5, is_approved=True)
+    EmployerReview.objects.create(worker=worker, employer=employer, rate=5, is_approved=True)
+
+    return {
+        'employer': employer,
+        'worker': worker,
+        'job': jobs[0],
+        'worker_proposal': worker_proposal,
+        'employer_proposal': employer_proposal,
+        # курсор ленты на середине списка вакансий
+        'since': [jobs[rows // 2].approved_at.isoformat(), jobs[rows // 2].id],
+    }
+
+
+def keyboard_calls(data, state):
+    employer, worker, job = data['employer'], data['worker'], data['job']
+    worker_proposal, employer_proposal = data['worker_proposal'], data['employer_proposal']
+    worker_user, employer_user = int(worker.tg_id), int(employer.tg_id)
+
+    return {
+        'admin_worker_keyboard': lambda: keyboards.admin_worker_keyboard('worker', worker.id),
+        'more_workers_channel_keyboard': keyboards.more_workers_channel_keyboard,
+        'more_jobs_channel_keyboard': keyboards.more_jobs_channel_keyboard,
+        'choose_target_keyboard': keyboards.choose_target_keyboard,
+        'request_phone_keyboard': lambda: keyboards.request_phone_keyboard('rus'),
+        'zones_keyboard': lambda: keyboards.zones_keyboard('rus', state),
+        'work_type_keyboard': lambda: keyboards.work_type_keyboard('heb'),
+        'worker_notification_keyboard': keyboards.worker_notification_keyboard,
+        'worker_profile_confirmation_keyboard': keyboards.worker_profile_confirmation_keyboard,
+        'worker_profile_keyboard': lambda: keyboards.worker_profile_keyboard(worker.id),
+        'worker_change_cv_keyboard': keyboards.worker_change_cv_keyboard,
+        'worker_to_main_menu_keyboard': keyboards.worker_to_main_menu_keyboard,
+        'worker_main_menu': keyboards.worker_main_menu,
+        'worker_jobs_menu_keyboard': keyboards.worker_jobs_menu_keyboard,
+        'worker_proposals_menu_keyboard': keyboards.worker_proposals_menu_keyboard,
+        'worker_reviews_menu_keyboard': keyboards.worker_reviews_menu_keyboard,
+        'worker_jobs_list_keyboard(all-jobs)': lambda: keyboards.worker_jobs_list_keyboard(2, 'all-jobs', worker_user),
+        'worker_jobs_list_keyboard(suitable-jobs)': lambda: keyboards.worker_jobs_list_keyboard(2, 'suitable-jobs', worker_user),
+        'worker_jobs_list_keyboard(new-jobs)': lambda: keyboards.worker_jobs_list_keyboard(1, 'new-jobs', worker_user, data['since']),
+        'worker_job_details_keyboard': lambda: keyboards.worker_job_details_keyboard(job.id, worker.tg_id),
+        'worker_job_detail_redirect': lambda: keyboards.worker_job_detail_redirect('suitable-jobs', job.id),
+        'worker_job_detail_back': lambda: keyboards.worker_job_detail_back(job.id, worker_proposal.id),
+        'worker_proposals_list_keyboard(outbox)': lambda: keyboards.worker_proposals_list_keyboard(1, 'outbox-proposals', worker_user),
+        'worker_proposals_list_keyboard(inbox)': lambda: keyboards.worker_proposals_list_keyboard(1, 'inbox-proposals', worker_user),
+        'worker_outbox_proposal_details_keyboard': lambda: keyboards.worker_outbox_proposal_details_keyboard(job.id, worker_proposal.id),
+        'worker_inbox_proposal_details_keyboard': lambda: keyboards.worker_inbox_proposal_details_keyboard(employer_proposal.id),
+        'worker_reviews_list_keyboard(outbox)': lambda: keyboards.worker_reviews_list_keyboard(1, 'outbox-reviews', worker_user),
+        'worker_reviews_list_keyboard(inbox)': lambda: keyboards.worker_reviews_list_keyboard(1, 'inbox-reviews', worker_user),
+        'employer_main_menu': keyboards.employer_main_menu,
+        'employer_jobs_menu_keyboard': keyboards.employer_jobs_menu_keyboard,
+        'employer_workers_menu_keyboard': keyboards.employer_workers_menu_keyboard,
+        'employer_jobs_list_keyboard(jobs-active)': lambda: keyboards.employer_jobs_list_keyboard(2, 'jobs-active', employer_user),
+        'employer_jobs_edit_keyboard': lambda: keyboards.employer_jobs_edit_keyboard(job.id),
+        'employer_workers_list_keyboard(workers-all)': lambda: keyboards.employer_workers_list_keyboard(2, 'workers-all', employer_user),
+        'employer_workers_list_keyboard(workers-suitable)': lambda: keyboards.employer_workers_list_keyboard(2, 'workers-suitable', employer_user),
+        'employer_worker_details_keyboard': lambda: keyboards.employer_worker_details_keyboard(worker.id, employer.tg_id),
+        'employer_proposals_list_keyboard(inbox)': lambda: keyboards.employer_proposals_list_keyboard(1, 'inbox-proposals', employer_user),
+        'employer_proposals_list_keyboard(outbox)': lambda: keyboards.employer_proposals_list_keyboard(1, 'outbox-proposals', employer_user),
+        'employer_outbox_proposal_details_keyboard': lambda: keyboards.employer_outbox_proposal_details_keyboard(worker.id, employer_proposal.id),
+        'employer_inbox_proposal_details_keyboard': lambda: keyboards.employer_inbox_proposal_details_keyboard(worker_proposal.id),
+        'employer_reviews_list_keyboard(inbox)': lambda: keyboards.employer_reviews_list_keyboard(1, 'inbox-reviews', employer_user),
+        'employer_reviews_list_keyboard(outbox)': lambda: keyboards.employer_reviews_list_keyboard(1, 'outbox-reviews', employer_user),
+    }
+
+
+async def timed(call):
+    start = time.perf_counter()
+    await call()
+    return time.perf_counter() - start
+
+
+class BudgetReplayer(Replayer):
+    """Считает запросы каждого апдейта через CaptureQueriesContext.
+
+    Запросы хендлеров выполняются в основном потоке теста (sync_to_async с thread_sensitive),
+    поэтому замер открывается и закрывается там же. Фоновые задачи апдейта (рассылки, загрузка
+    паспорта) после него отменяются, чтобы их запросы не попали в следующие шаги.
+    """
+
+    def __init__(self, bot, dp, measure):
+        super().__init__(bot, dp)
+        self.measure = measure
+
+    async def feed(self, step, payload):
+        update = self.build_update(payload)
+        tasks = asyncio.all_tasks()
+
+        measure = self.measure()
+        queries = await sync_to_async(measure.__enter__)()
+        start = time.perf_counter()
+        try:
+            await self.dp.feed_update(self.bot, update)
+        finally:
+            elapsed = time.perf_counter() - start
+            background = asyncio.all_tasks() - tasks
+            for task in background:
+                task.cancel()
+            await asyncio.gather(*background, return_exceptions=True)
+            await sync_to_async(measure.__exit__)(None, None, None)
+
+        # список запросов берется у соединения основного потока
+        self.samples[step].append((elapsed, await sync_to_async(len)(queries)))
+
+
+class QueryBudgetTests(TestCase):
+    """Бюджеты запросов к БД и времени для клавиатур и апдейтов сценария пользователей на локальной замене Bot API."""
+
+    @classmethod
+    def setUpTestData(cls):
+        with redirect_stdout(io.StringIO()):
+            call_command('add_zones')
+            call_command('add_text')
+            call_command('add_buttons')
+
+        cls.data = seed_budget_data()
+
+    def setUp(self):
+        # кэши в памяти бота общие для процесса, у каждого теста они свои
+        self.patch(mock.patch.dict(catalogue._cache, clear=True))
+        self.patch(mock.patch.dict(listings._cache, clear=True))
+        self.patch(mock.patch.dict(delivery._cache, {'tg_ids': None, 'expires_at': 0}))
+        self.patch(mock.patch.dict(routers._sticky, clear=True))
+        self.matcher = self.patch(mock.patch('core.matcher.matcher', Matcher()))
+        self.patch(mock.patch('core.matcher.publish_change'))
+
+        # паспорт обрабатывает celery в другом процессе, в бюджет бота он не входит
+        self.patch(mock.patch('handlers.worker_profile.save_passport_photo'))
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        upload_settings = self.settings(PASSPORT_UPLOAD_DIR=upload_dir.name)
+        upload_settings.enable()
+        self.addCleanup(upload_settings.disable)
+
+        self.patch(mock.patch('benchmarks.journeys.ADMIN_CHAT_ID', ADMIN_CHAT_ID or '-1001'))
+        for module, func in translation_functions():
+            self.patch(mock.patch.object(module, func, fake_translate))
+
+        self.bot = Bot(token='123456:test', session=FakeSession())
+
+        # справочники, общие списки, снимок для подбора и недоступные пользователи кэшируются в памяти
+        # при первом обращении, бюджеты считаются для прогретого кэша
+        self.matcher.load()
+        async_to_sync(self.warm)()
+
+    def patch(self, patcher):
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    @staticmethod
+    async def warm():
+        await get_areas()
+        await get_button('confirm')
+        await get_text('salary_hourly')
+        await get_listing('jobs')
+        await get_listing('workers')
+        await unreachable_chats()
+
+    @contextmanager
+    def measure(self):
+        # транзакция теста не фиксируется, колбэки on_commit (обновление снимка подбора,
+        # сброс кэша списков) выполняются в конце апдейта, как после коммита
+        with CaptureQueriesContext(connection) as queries, self.captureOnCommitCallbacks(execute=True):
+            yield queries
+
+    def test_keyboards(self):
+        state = FSMContext(storage=MemoryStorage(), key=StorageKey(bot_id=self.bot.id, chat_id=1, user_id=1))
+        async_to_sync(state.update_data)(zones=['1', '3'])
+
+        for name, call in keyboard_calls(self.data, state).items():
+            with self.subTest(keyboard=name):
+                with self.measure() as queries:
+                    elapsed = async_to_sync(timed)(call)
+
+                self.assertLessEqual(len(queries), KEYBOARD_BUDGETS[name])
+                self.assertLessEqual(elapsed * 1000, KEYBOARD_MAX_MS)
+
+    def test_handlers(self):
+        replayer = BudgetReplayer(self.bot, create_dispatcher(MemoryStorage()), self.measure)
+        async_to_sync(full_journey)(replayer, *journey_user_ids(0))
+
+        self.assertEqual(set(replayer.samples), set(HANDLER_BUDGETS))
+        for step, samples in replayer.samples.items():
+            with self.subTest(step=step):
+                self.assertLessEqual(max(count for _, count in samples), HANDLER_BUDGETS[step])
+                self.assertLessEqual(max(elapsed for elapsed, _ in samples) * 1000, HANDLER_MAX_MS)
+
+
+class AdminChangelistQueriesTests(TestCase):
+    """Число запросов страницы списка в админке не зависит от числа строк на ней."""
+
+    CHANGELISTS = (
+        'core_tguser',
+        'core_worker',
+        'core_employer',
+        'core_job',
+        'core_workercooperationproposal',
+        'core_employercooperationproposal',
+        'core_workerreview',
+        'core_employerreview',
+    )
+
+    ROWS = 5
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.areas = [Area.objects.create(number=number) for number in (1, 2, 3)]
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        self.seeded = 0
+
+    def seed(self, count):
+        for num in range(self.seeded, self.seeded + count):
+            tg_id = f'{num:04d}'
+            TGUser.objects.create(tg_id=f'w{tg_id}', target='1')
+            TGUser.objects.create(tg_id=f'e{tg_id}', target='2')
+            worker = Worker.objects.create(tg_id=f'w{tg_id}', phone=tg_id, is_approved=True)
+            worker.areas.set(self.areas[:num % 3 + 1])
+            employer = Employer.objects.create(tg_id=f'e{tg_id}', phone=tg_id)
+            job = Job.objects.create(employer=employer, is_approved=True)
+            job.areas.set(self.areas[:num % 3 + 1])
+
+            WorkerCooperationProposal.objects.create(worker=worker, employer=employer, job=job)
+            EmployerCooperationProposal.objects.create(worker=worker, employer=employer)
+            WorkerReview.objects.create(worker=worker, employer=employer)
+            EmployerReview.objects.create(worker=worker, employer=employer)
+
+        self.seeded += count
+
+    def changelist_queries(self, name):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse(f'admin:{name}_changelist'))
+
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_grow_with_rows(self):
+        self.seed(self.ROWS)
+        queries = {name: self.changelist_queries(name) for name in self.CHANGELISTS}
+
+        self.seed(self.ROWS)
+        for name in self.CHANGELISTS:
+            with self.subTest(changelist=name):
+                self.assertEqual(self.changelist_queries(name), queries[name])
+
+
+class NewJobsFeedTests(TestCase):
+    """Лента новых вакансий идет по времени одобрения, а не создания."""
+
+    def test_job_approved_after_cursor_is_new(self):
+        area = Area.objects.create(number=1)
+        employer = Employer.objects.create(tg_id=synthetic_tg_id(0))
+        worker = Worker.objects.create(tg_id=synthetic_tg_id(1), is_approved=True)
+        worker.areas.set([area])
+
+        # вакансия создана раньше той, на которой остановился курсор, но одобрена позже
+        pending = Job.objects.create(employer=employer)
+        pending.areas.set([area])
+        seen = Job.objects.create(employer=employer, is_approved=True, approved_at=timezone.now())
+        seen.areas.set([area])
+        cursor = [seen.approved_at.isoformat(), seen.id]
+
+        pending.is_approved = True
+        pending.approved_at = timezone.now()
+        pending.save()
+
+        self.assertEqual(list(Job.objects.filter(newer_than(cursor))), [pending])
+
+        matcher = Matcher()
+        matcher.load()
+        self.assertEqual([row.id for row in matcher.jobs_for_worker(worker.tg_id, since=cursor)], [pending.id])
+
+
+class MatcherFreshnessTests(TestCase):
+    """Снимок для подбора не расходится с БД из-за правок в других процессах и откаченных удалений."""
+
+    def setUp(self):
+        self.matcher = mock.patch('core.matcher.matcher', Matcher()).start()
+        self.addCleanup(mock.patch.stopall)
+        mock.patch('core.matcher.publish_change').start()
+        mock.patch.dict(delivery._cache, {'tg_ids': None, 'expires_at': 0}).start()
+
+        area = Area.objects.create(number=1)
+        self.job = Job.objects.create(employer=Employer.objects.create(tg_id=synthetic_tg_id(0)),
+                                      min_salary=50, is_approved=True)
+        self.job.areas.set([area])
+        self.worker = Worker.objects.create(tg_id=synthetic_tg_id(1), min_salary=10, is_approved=True, notifications=True)
+        self.worker.areas.set([area])
+        self.job.refresh_from_db()
+        self.matcher.load()
+
+    def test_recipients_are_checked_against_db(self):
+        self.assertEqual(async_to_sync(job_recipients)(self.job), ([self.worker.tg_id], []))
+
+        # правка из админки (другой процесс): сигналы бота о ней не знают
+        Worker.objects.filter(id=self.worker.id).update(notifications=False)
+        self.assertEqual(async_to_sync(job_recipients)(self.job), ([], []))
+
+    def test_reload_applies_changes_from_other_processes(self):
+        Job.objects.filter(id=self.job.id).update(is_active=False)
+        self.matcher.reload('jobs', [self.job.id])
+        self.assertEqual(self.matcher.jobs_for_worker(self.worker.tg_id), [])
+
+        Job.objects.filter(id=self.job.id).delete()
+        self.matcher.reload('jobs', [self.job.id])
+        self.assertIsNone(self.matcher.jobs.get(self.job.id))
+
+    def test_rolled_back_delete_keeps_row(self):
+        job_id = self.job.id
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                Job.objects.get(id=job_id).delete()
+                raise RuntimeError
+
+        self.assertEqual([row.id for row in self.matcher.jobs_for_worker(self.worker.tg_id)], [job_id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Job.objects.get(id=job_id).delete()
+
+        self.assertEqual(self.matcher.jobs_for_worker(self.worker.tg_id), [])
+
+
+class ZoneMaskTests(TestCase):
+    """zone_mask следует за зонами при удалении и смене номера зоны."""
+
+    def setUp(self):
+        self.first, self.second = Area.objects.create(number=1), Area.objects.create(number=2)
+        self.worker = Worker.objects.create(tg_id=synthetic_tg_id(1))
+        self.worker.areas.set([self.first, self.second])
+        self.job = Job.objects.create(employer=Employer.objects.create(tg_id=synthetic_tg_id(0)))
+        self.job.areas.set([self.second])
+
+    def masks(self):
+        return Worker.objects.get(id=self.worker.id).zone_mask, Job.objects.get(id=self.job.id).zone_mask
+
+    def test_number_must_fit_into_mask(self):
+        for number in (0, 64):
+            with self.subTest(number=number), self.assertRaises(ValidationError):
+                Area(number=number).full_clean()
+
+    def test_area_renumbered(self):
+        self.second.number = 5
+        self.second.save()
+        self.assertEqual(self.masks(), (0b10001, 0b10000))
+
+    def test_area_deleted(self):
+        self.second.delete()
+        self.assertEqual(self.masks(), (0b1, 0))
+
+
+class ChannelPosterTests(TestCase):
+    """Отклоненная склейка постов канала не теряет остальные посты."""
+
+    @mock.patch('channel_posting.CHANNEL_POST_INTERVAL', 0)
+    def test_rejected_batch_is_sent_one_by_one(self):
+        sent = []
+
+        async def send_message(chat_id, text, **kwargs):
+            if 'bad' in text:
+                raise TelegramBadRequest(method=SendMessage(chat_id=chat_id, text=text), message="Bad Request: can't parse entities")
+            sent.append(text)
+
+        async def publish():
+            poster = ChannelPoster()
+            bot = mock.Mock(send_message=send_message)
+            for text in ('first', 'bad', 'second'):
+                poster.publish(bot, ['-100'], ChannelPost(text=text))
+
+            await asyncio.sleep(0.05)
+            poster._tasks['-100'].cancel()
+
+        with self.assertLogs(level='ERROR'):
+            async_to_sync(publish)()
+
+        self.assertEqual(sent, ['first', 'second'])
+
+
+
+class PassportPhotoTests(TestCase):
+    """Со своим сервером Bot API фото паспорта читается с общего тома, а не скачивается по HTTP."""
+
+    def test_local_server_file_is_read_from_mounted_dir(self):
+        upload_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(upload_dir.cleanup)
+        volume = tempfile.TemporaryDirectory()
+        self.addCleanup(volume.cleanup)
+        server_dir = os.path.join(volume.name, 'server')
+        files_dir = os.path.join(volume.name, 'bot')
+
+        fake_api = FakeBotAPI(files_dir=server_dir)
+        api = api_server('http://bot-api:8081', server_dir=server_dir, files_dir=files_dir)
+        bot = Bot(token='123456:test', session=FakeSession(fake_api=fake_api, api=api))
+
+        async def store():
+            file = await bot.get_file('passport')
+            # у бота том сервера смонтирован по другому пути: по пути сервера файла нет
+            os.rename(server_dir, files_dir)
+            await store_passport_photo(bot, 1, '42', file.file_path)
+
+        with self.settings(PASSPORT_UPLOAD_DIR=upload_dir.name), \
+                mock.patch('handlers.worker_profile.save_passport_photo') as save_passport_photo:
+            async_to_sync(store)()
+
+        save_passport_photo.delay.assert_called_once()
+        worker_id, file_path, original_filename = save_passport_photo.delay.call_args.args
+        self.assertEqual(worker_id, 1)
+        self.assertTrue(original_filename.startswith('42_'))
+        with open(file_path, 'rb') as file:
+            self.assertEqual(file.read(), fake_api._photo)
+        self.assertNotIn('downloadFile', fake_api.calls)
+
+    def test_api_server_maps_server_dir_to_files_dir(self):
+        api = api_server('http://bot-api:8081', server_dir='/var/lib/telegram-bot-api', files_dir='/srv/bot-api')
+        self.assertTrue(api.is_local)
+        self.assertEqual(str(api.wrap_local_file.to_local('/var/lib/telegram-bot-api/token/photos/file_1.jpg')),
+                         '/srv/bot-api/token/photos/file_1.jpg')
+
+        api = api_server('http://bot-api:8081', server_dir='/srv/bot-api', files_dir='/srv/bot-api')
+        self.assertEqual(api.wrap_local_file.to_local('/srv/bot-api/photos/file_1.jpg'), '/srv/bot-api/photos/file_1.jpg')
+
+        self.assertFalse(api_server(None).is_local)
+
+
+class ReplicaRouterTests(TransactionTestCase):
+    """Чтения бота идут в реплику, кроме чтений вне апдейтов, в транзакции и сразу после своей записи.
+
+    Реплика в тестах - зеркало основной БД (TEST MIRROR в настройках), то есть второе
+    соединение с той же БД. TransactionTestCase, потому что TestCase держит основную БД в транзакции, и роутер
+    отправлял бы в нее все чтения.
+    """
+    databases = {'default', routers.REPLICA}
+
+    def setUp(self):
+        patcher = mock.patch.dict(routers._sticky, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def as_user(self, user_id):
+        token = routers.current_user.set(user_id)
+        self.addCleanup(routers.current_user.reset, token)
+
+    def read_db(self):
+        with CaptureQueriesContext(connections['default']) as default, \
+                CaptureQueriesContext(connections[routers.REPLICA]) as replica:
+            list(TGUser.objects.all())
+
+        self.assertEqual(len(default) + len(replica), 1)
+        return routers.REPLICA if replica else 'default'
+
+    def test_reads_without_user_go_to_default(self):
+        self.assertEqual(self.read_db(), 'default')
+
+    def test_user_reads_go_to_replica(self):
+        self.as_user('1')
+        self.assertEqual(self.read_db(), routers.REPLICA)
+
+    def test_reads_in_atomic_go_to_default(self):
+        self.as_user('1')
+        with transaction.atomic():
+            self.assertEqual(self.read_db(), 'default')
+
+    @mock.patch('core.routers.DB_REPLICA_STICKY_SECONDS', 5)
+    def test_user_reads_own_writes_from_default(self):
+        self.as_user('1')
+        TGUser.objects.create(tg_id='1', target='1')
+        written_at = time.monotonic()
+
+        self.assertEqual(self.read_db(), 'default')
+        with mock.patch('core.routers.time.monotonic', return_value=written_at + 4):
+            self.assertEqual(self.read_db(), 'default')
+
+        # другие пользователи продолжают читать из реплики
+        self.as_user('2')
+        self.assertEqual(self.read_db(), routers.REPLICA)
+
+        self.as_user('1')
+        with mock.patch('core.routers.time.monotonic', return_value=written_at + 6):
+            self.assertEqual(self.read_db(), routers.REPLICA)
@@ -6,10 +6,13 @@ from aiogram import Router, F
 from aiogram.types import CallbackQuery
 from asgiref.sync import sync_to_async
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from django.utils import timezone
+from redis.asyncio import Redis
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from core.models import Worker, Text, Job, WorkerReview, EmployerReview
 from keyboards.callbacks import AdminControlsCallBackFactory
 from keyboards import keyboards
@@ -21,10 +24,11 @@ from notifications_center import (new_worker_to_employers_channels,
                                   )
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 
 
 @router.callback_query(AdminControlsCallBackFactory.filter(F.target == 'worker'))
-async def admin_worker_controls(callback: CallbackQuery, callback_data: AdminControlsCallBackFactory):
+async def admin_worker_controls(callback: CallbackQuery, callback_data: AdminControlsCallBackFactory, redis: Redis = None):
     worker_id = callback_data.object_id
     worker = await sync_to_async(Worker.objects.filter(id=worker_id).first)()
     if worker:
@@ -39,7 +43,7 @@ async def admin_worker_controls(callback: CallbackQuery, callback_data: AdminCon
                 about_heb = await escape_markdown(about_heb)
                 worker.about_heb = about_heb
                 asyncio.create_task(new_worker_to_employers_channels(callback.bot, worker, about_heb))
-                asyncio.create_task(new_worker_to_employers(callback.bot, worker, about_heb))
+                asyncio.create_task(new_worker_to_employers(callback.bot, worker, about_heb, redis))
             
         elif callback_data.action == 'decline':
             admin_reply_text = 'Резюме отклонено, пользователь уведомлен о необходимости заполнить заново.'
@@ -66,18 +70,19 @@ async def admin_worker_controls(callback: CallbackQuery, callback_data: AdminCon
 
 
 @router.callback_query(AdminControlsCallBackFactory.filter(F.target == 'job'))
-async def admin_job_controls(callback: CallbackQuery, callback_data: AdminControlsCallBackFactory):
+async def admin_job_controls(callback: CallbackQuery, callback_data: AdminControlsCallBackFactory, redis: Redis = None):
     job_id = callback_data.object_id
     job = await sync_to_async(Job.objects.filter(id=job_id).first)()
     employer = await sync_to_async(lambda: job.employer)()
     if job:
         if callback_data.action == 'accept':
             job.is_approved = True
+            job.approved_at = timezone.now()
             admin_reply_text = 'Вакансия одобрена. Инициализирована рассылка по работникам и каналам.'
             reply_text = await sync_to_async(Text.objects.get)(slug='job_approved')
             keyboard = await keyboards.employer_job_detail_redirect('jobs-active', job_id)
             asyncio.create_task(new_jobs_to_workers_channels(callback.bot, job))
-            asyncio.create_task(new_job_to_workers(callback.bot, job))
+            asyncio.create_task(new_job_to_workers(callback.bot, job, redis))
 
         elif callback_data.action == 'decline':
             admin_reply_text = 'Вакансия отклонена, работодатель уведомлен.'
@@ -10,6 +10,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from states.pages_navigation import PageNavigation
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
 from core.models import Text
 from keyboards.callbacks import EmployerBackCallBackFactory
@@ -17,6 +18,7 @@ from keyboards import keyboards
 
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 router.callback_query.middleware(UpdateUsernameMiddleware())
 
 
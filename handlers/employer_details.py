@@ -11,7 +11,9 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from config import MAX_SYMBOLS
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
+from middlewares.unchanged_edits import SkipUnchangedRenderMiddleware
 from states.pages_navigation import PageNavigation
 from core.models import Text, Job, Worker, EmployerCooperationProposal, WorkerCooperationProposal, WorkerReview, EmployerReview
 from keyboards.callbacks import EmployerDetailsCallBackFactory, EmployerRedirectDetailsCallBackFactory
@@ -19,7 +21,9 @@ from keyboards import keyboards
 
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 router.callback_query.middleware(UpdateUsernameMiddleware())
+router.callback_query.middleware(SkipUnchangedRenderMiddleware())
 
 
 @router.callback_query(EmployerDetailsCallBackFactory.filter(F.object_name == 'job'))
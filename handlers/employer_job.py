@@ -7,11 +7,13 @@ from aiogram.types import Message, CallbackQuery
 from asgiref.sync import sync_to_async
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
+from django.db import transaction
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from config import ADMIN_CHAT_ID, MAX_LEN
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
 from core.models import Employer, Text, Job, Area
 from states.create_job import CreateJob
@@ -24,10 +26,20 @@ from keyboards.callbacks import (EmployerControlsCallBackFactory,
 
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 router.callback_query.middleware(UpdateUsernameMiddleware())
 router.message.middleware(UpdateUsernameMiddleware())
 
 
+@sync_to_async
+def create_job(employer, zones, **fields):
+    with transaction.atomic():
+        job = Job.objects.create(employer=employer, **fields)
+        job.areas.add(*Area.objects.filter(number__in=[int(zone) for zone in zones or []]))
+
+    return job
+
+
 @router.callback_query(EmployerControlsCallBackFactory.filter((F.control == 'jobs') & (F.action == 'add')))
 async def employer_add_job(callback: CallbackQuery, callback_data: EmployerControlsCallBackFactory, state: FSMContext):
     await state.clear()
@@ -64,12 +76,17 @@ async def employer_choose_zones(callback: CallbackQuery, callback_data: ZoneCall
         pass
 
 
-@router.callback_query(ZoneCallbackFactory.filter(F.zone == "confirm"), CreateJob.input_zones)
+@router.callback_query(ZoneCallbackFactory.filter(F.zone == "confirm"), CreateJob.input_zones, flags={'answer_callback': False})
 async def employer_confirm_zones(callback: CallbackQuery, callback_data: ZoneCallbackFactory, state: FSMContext):
     state_data = await state.get_data()
     zones = state_data.get('zones', False)
 
     if zones:
+        try:
+            await callback.answer()
+        except:
+            pass
+
         await state.set_state(CreateJob.input_min_salary)
         reply_text = await sync_to_async(Text.objects.get)(slug='employer_min_salary')
         try:
@@ -233,19 +250,15 @@ async def employer_job_confirm(callback: CallbackQuery, callback_data: EmployerC
         permanent = state_data.get('permanent')
         zones = state_data.get('zones')
         
-        job = await sync_to_async(Job.objects.create)(
-            employer=employer,
+        job = await create_job(
+            employer,
+            zones,
             min_salary=min_salary,
             description=description,
             notifications=notifications,
             permanent_work=permanent,
         )
         
-        for zone in zones:
-            curr_zone = await sync_to_async(Area.objects.filter(number=int(zone)).first)()
-            if curr_zone:
-                await sync_to_async(job.areas.add)(curr_zone)
-        
         reply_text = await sync_to_async(Text.objects.get)(slug='job_wait_check')
         try:
             await callback.message.edit_text(
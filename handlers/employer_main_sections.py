@@ -9,6 +9,7 @@ from aiogram.fsm.context import FSMContext
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
 from core.models import Employer, Text
 from keyboards import keyboards
@@ -17,6 +18,7 @@ from keyboards.callbacks import EmployerMainSectionsCallBackFactory
 
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 router.callback_query.middleware(UpdateUsernameMiddleware())
 
 
@@ -43,7 +45,7 @@ async def handle_profile_menu(callback: CallbackQuery, callback_data: EmployerMa
         try:
             await callback.message.edit_text(
                 text=reply_text,
-                reply_markup=await keyboards.employer_profile_keyboard(),
+                reply_markup=await keyboards.employer_profile_keyboard(employer.notifications_digest),
                 parse_mode='Markdown',
             )
         except:
@@ -9,7 +9,9 @@ from aiogram.fsm.context import FSMContext
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
+from middlewares.unchanged_edits import SkipUnchangedRenderMiddleware
 from states.pages_navigation import PageNavigation
 from core.models import Text, Employer
 from keyboards.callbacks import EmployerPagesSectionsCallBackFactory
@@ -17,7 +19,9 @@ from keyboards import keyboards
 
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 router.callback_query.middleware(UpdateUsernameMiddleware())
+router.callback_query.middleware(SkipUnchangedRenderMiddleware())
 
 
 @router.callback_query(EmployerPagesSectionsCallBackFactory.filter(F.destination.contains('jobs')))
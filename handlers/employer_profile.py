@@ -110,7 +110,7 @@ async def employer_company_name(message: Message, state: FSMContext):
     try:
         await message.answer(
             text=reply_text,
-            reply_markup=await keyboards.employer_profile_keyboard(),
+            reply_markup=await keyboards.employer_profile_keyboard(employer.notifications_digest),
             parse_mode='Markdown',
         )
     except:
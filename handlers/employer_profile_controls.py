@@ -13,6 +13,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from config import MAX_LEN
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
 from core.models import Text, Employer, Worker, EmployerCooperationProposal, WorkerCooperationProposal, EmployerReview
 from keyboards.callbacks import EmployerControlsCallBackFactory
@@ -24,6 +25,7 @@ from utils import escape_markdown, translate_to_rus
 
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 router.callback_query.middleware(UpdateUsernameMiddleware())
 router.message.middleware(UpdateUsernameMiddleware())
 
@@ -48,6 +50,21 @@ async def handle_change_phone(callback: CallbackQuery, callback_data: EmployerCo
             pass
 
 
+@router.callback_query(EmployerControlsCallBackFactory.filter(F.control == 'digest'))
+async def handle_digest_controls(callback: CallbackQuery, callback_data: EmployerControlsCallBackFactory):
+    employer = await sync_to_async(Employer.objects.filter(tg_id=callback.from_user.id).first)()
+    if employer:
+        employer.notifications_digest = callback_data.action == 'enable'
+        await sync_to_async(employer.save)()
+
+        try:
+            await callback.message.edit_reply_markup(
+                reply_markup=await keyboards.employer_profile_keyboard(employer.notifications_digest),
+            )
+        except:
+            pass
+
+
 @router.callback_query(EmployerControlsCallBackFactory.filter((F.control == 'proposal') & (F.action == 'make')))
 async def handle_make_proposal(callback: CallbackQuery, callback_data: EmployerControlsCallBackFactory, state=FSMContext):
     worker = await sync_to_async(Worker.objects.filter(id=callback_data.object_id).first)()
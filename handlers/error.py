@@ -9,11 +9,13 @@ from aiogram.utils.keyboard import InlineKeyboardBuilder
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from core.models import TGUser, Text
 from filters import ChatTypeFilter
 
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 
 
 @router.message(F.text, ChatTypeFilter(chat_type='private'))
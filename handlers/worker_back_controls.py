@@ -10,9 +10,11 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from states.pages_navigation import PageNavigation
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
 from middlewares.worker_active_profile import IsActiveProfileMiddleware
 from core.models import Text
+from core.job_feed import feed_since
 from keyboards.callbacks import WorkerBackCallBackFactory
 from keyboards import keyboards
 
@@ -20,6 +22,7 @@ from keyboards import keyboards
 router = Router()
 router.callback_query.middleware(UpdateUsernameMiddleware())
 router.callback_query.middleware(IsActiveProfileMiddleware())
+router.callback_query.middleware(AnswerCallbackMiddleware())
 
 
 @router.callback_query(WorkerBackCallBackFactory.filter(F.destination == 'main'))
@@ -44,10 +47,14 @@ async def back_jobs_list(callback: CallbackQuery, callback_data: WorkerBackCallB
     destination = state_data.get('destination')
 
     if page and destination:
+        since = None
         if destination == 'all-jobs':
             reply_text = await sync_to_async(Text.objects.get)(slug='all_jobs')
         elif destination == 'suitable-jobs':
             reply_text = await sync_to_async(Text.objects.get)(slug='jobs_suitable')
+        elif destination == 'new-jobs':
+            reply_text = await sync_to_async(Text.objects.get)(slug='jobs_new')
+            since = await feed_since(state)
 
         try:
             await callback.message.edit_text(
@@ -55,7 +62,8 @@ async def back_jobs_list(callback: CallbackQuery, callback_data: WorkerBackCallB
                 reply_markup=await keyboards.worker_jobs_list_keyboard(
                     page, 
                     destination, 
-                    callback.from_user.id),
+                    callback.from_user.id,
+                    since),
             )
         except:
             pass
@@ -11,7 +11,9 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from config import MAX_SYMBOLS
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
+from middlewares.unchanged_edits import SkipUnchangedRenderMiddleware
 from middlewares.worker_active_profile import IsActiveProfileMiddleware
 from states.pages_navigation import PageNavigation
 from core.models import (Text, Job, Employer, WorkerCooperationProposal, 
@@ -23,6 +25,8 @@ from keyboards import keyboards
 router = Router()
 router.callback_query.middleware(UpdateUsernameMiddleware())
 router.callback_query.middleware(IsActiveProfileMiddleware())
+router.callback_query.middleware(AnswerCallbackMiddleware())
+router.callback_query.middleware(SkipUnchangedRenderMiddleware())
 
 
 @router.callback_query(WorkerDetailsCallBackFactory.filter(F.object_name == 'job'))
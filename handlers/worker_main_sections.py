@@ -9,6 +9,7 @@ from aiogram.fsm.context import FSMContext
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
 from middlewares.worker_active_profile import IsActiveProfileMiddleware
 from core.models import Worker, Text
@@ -19,8 +20,10 @@ from keyboards.callbacks import WorkerMainSectionsCallBackFactory
 router = Router()
 router.callback_query.middleware(UpdateUsernameMiddleware())
 router.callback_query.middleware(IsActiveProfileMiddleware())
+router.callback_query.middleware(AnswerCallbackMiddleware())
 
 profile_router = Router()
+profile_router.callback_query.middleware(AnswerCallbackMiddleware())
 profile_router.callback_query.middleware(UpdateUsernameMiddleware())
 
 
@@ -9,10 +9,13 @@ from aiogram.fsm.context import FSMContext
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
+from middlewares.unchanged_edits import SkipUnchangedRenderMiddleware
 from middlewares.worker_active_profile import IsActiveProfileMiddleware
 from states.pages_navigation import PageNavigation
 from core.models import Text
+from core.job_feed import open_feed, feed_since
 from keyboards.callbacks import WorkerPagesSectionsCallBackFactory
 from keyboards import keyboards
 
@@ -20,26 +23,39 @@ from keyboards import keyboards
 router = Router()
 router.callback_query.middleware(UpdateUsernameMiddleware())
 router.callback_query.middleware(IsActiveProfileMiddleware())
+router.callback_query.middleware(AnswerCallbackMiddleware())
+router.callback_query.middleware(SkipUnchangedRenderMiddleware())
 
 
 @router.callback_query(WorkerPagesSectionsCallBackFactory.filter(F.destination.contains('jobs')))
 async def handle_search_controls(callback: CallbackQuery, callback_data: WorkerPagesSectionsCallBackFactory, state=FSMContext):
+    page = callback_data.page
+    since = None
+    if callback_data.destination == 'new-jobs':
+        if page == 0:
+            await open_feed(state)
+            page = 1
+        since = await feed_since(state)
+
     await state.clear()
     await state.set_state(PageNavigation.page_navigation)
-    await state.set_data({'destination': callback_data.destination, 'page': callback_data.page})
+    await state.set_data({'destination': callback_data.destination, 'page': page})
 
     if callback_data.destination == 'all-jobs':
         reply_text = await sync_to_async(Text.objects.get)(slug='all_jobs')
     elif callback_data.destination == 'suitable-jobs':
         reply_text = await sync_to_async(Text.objects.get)(slug='jobs_suitable')
+    elif callback_data.destination == 'new-jobs':
+        reply_text = await sync_to_async(Text.objects.get)(slug='jobs_new')
 
     try:
         await callback.message.edit_text(
             text=reply_text.rus,
             reply_markup=await keyboards.worker_jobs_list_keyboard(
-                callback_data.page, 
+                page, 
                 callback_data.destination, 
-                callback.from_user.id),
+                callback.from_user.id,
+                since),
         )
     except:
         pass
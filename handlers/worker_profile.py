@@ -1,20 +1,28 @@
 import os
 import uuid
+import asyncio
+import logging
 
 import django
-from aiogram import Router, F
+from aiogram import Bot, Router, F
+from aiogram.exceptions import TelegramAPIError
+from aiohttp import ClientError
 from aiogram.types import Message, ReplyKeyboardRemove, CallbackQuery
 from asgiref.sync import sync_to_async
 from aiogram.fsm.context import FSMContext
 from aiogram.utils.keyboard import InlineKeyboardBuilder
-from filer.models import Image, Folder
+from django.conf import settings
+from django.db import transaction
+from kombu.exceptions import OperationalError
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from config import ADMIN_CHAT_ID, MAX_LEN
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
 from core.models import Worker, Text, Area
+from core.tasks import save_passport_photo
 from states.create_worker import CreateWorker
 from keyboards import keyboards
 from utils import validate_phone, validate_salary, escape_markdown
@@ -26,10 +34,40 @@ from keyboards.callbacks import (ZoneCallbackFactory, PhotoCallbackFactory,
 
 
 router = Router()
+router.callback_query.middleware(AnswerCallbackMiddleware())
 router.callback_query.middleware(UpdateUsernameMiddleware())
 router.message.middleware(UpdateUsernameMiddleware())
 
 
+@sync_to_async
+def save_worker_profile(tg_id, zones, **fields):
+    # профиль и его зоны сохраняются вместе, чтобы при ошибке не оставалось полузаписанных анкет
+    with transaction.atomic():
+        worker, _ = Worker.objects.update_or_create(tg_id=tg_id, defaults=fields)
+        worker.areas.set(Area.objects.filter(number__in=[int(zone) for zone in zones or []]))
+
+    return worker
+
+
+# ссылки на фоновые загрузки фото паспорта, чтобы их не собрал сборщик мусора до завершения
+_store_tasks = set()
+
+
+async def store_passport_photo(bot: Bot, worker_id, user_id, passport_photo_path):
+    original_filename = f"{user_id}_{uuid.uuid4()}.{passport_photo_path.split('.')[-1]}"
+    file_path = os.path.join(settings.PASSPORT_UPLOAD_DIR, original_filename)
+
+    try:
+        os.makedirs(settings.PASSPORT_UPLOAD_DIR, exist_ok=True)
+        # файл пишется на диск по частям, целиком в память не загружается
+        await bot.download_file(passport_photo_path, destination=file_path)
+        await sync_to_async(save_passport_photo.delay)(worker_id, file_path, original_filename)
+    except (TelegramAPIError, ClientError, asyncio.TimeoutError, OSError, OperationalError):
+        logging.exception('Passport photo storing failed for worker %s', worker_id)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+
+
 @router.message(F.text, CreateWorker.input_name)
 async def worker_name(message: Message, state: FSMContext):
     name = await escape_markdown(message.text)
@@ -156,12 +194,17 @@ async def worker_change_zones(callback: CallbackQuery, callback_data: ZoneCallba
         pass
 
 
-@router.callback_query(ZoneCallbackFactory.filter(F.zone == "confirm"), CreateWorker.input_zones)
+@router.callback_query(ZoneCallbackFactory.filter(F.zone == "confirm"), CreateWorker.input_zones, flags={'answer_callback': False})
 async def worker_confirm_zones(callback: CallbackQuery, callback_data: ZoneCallbackFactory, state: FSMContext):
     state_data = await state.get_data()
     zones = state_data.get('zones', False)
 
     if zones:
+        try:
+            await callback.answer()
+        except:
+            pass
+
         await state.set_state(CreateWorker.input_about)
         reply_text = await sync_to_async(Text.objects.get)(slug='worker_about')
         try:
@@ -342,52 +385,23 @@ async def worker_confirmation(callback: CallbackQuery, callback_data: WorkerProf
         zones = state_data.get('zones')
         selfie = state_data.get('selfie')
 
-        passport_photo = None
-        try:
-            downloaded_file = await callback.bot.download_file(passport_photo_path)
-            folder, _ = await sync_to_async(Folder.objects.get_or_create)(name="Паспорта")
-            passport_photo = Image(
-                folder=folder,
-                original_filename=f"{callback.from_user.id}_{uuid.uuid4()}.{passport_photo_path.split('.')[-1]}",
-            )
-            await sync_to_async(passport_photo.file.save)(passport_photo.original_filename, downloaded_file)
-            await sync_to_async(passport_photo.save)()
-        except:
-            pass
-        
-        worker = await sync_to_async(Worker.objects.filter(tg_id=callback.from_user.id).first)()
-
-        if worker:
-            worker.name = name
-            worker.phone = phone
-            worker.passport_photo = passport_photo
-            worker.passport_photo_tg_id = passport_photo_id
-            await sync_to_async(worker.areas.clear)()
-            worker.about = about
-            worker.min_salary = min_salary
-            worker.notifications = notifications
-            worker.permanent_work = work_type
-            worker.selfie = selfie
-
-        else:
-            worker = await sync_to_async(Worker.objects.create)(
-                tg_id=callback.from_user.id,
-                name=name,
-                phone=phone,
-                passport_photo=passport_photo,
-                passport_photo_tg_id=passport_photo_id,
-                about=about,
-                min_salary=min_salary,
-                notifications=notifications,
-                permanent_work=work_type,
-                selfie = selfie,
-            )
+        worker = await save_worker_profile(
+            callback.from_user.id,
+            zones,
+            name=name,
+            phone=phone,
+            passport_photo_tg_id=passport_photo_id,
+            about=about,
+            min_salary=min_salary,
+            notifications=notifications,
+            permanent_work=work_type,
+            selfie=selfie,
+        )
 
-        for zone in zones:
-            area = await sync_to_async(Area.objects.filter(number=int(zone)).first)()
-            await sync_to_async(worker.areas.add)(area)
-        
-        await sync_to_async(worker.save)()
+        if passport_photo_path:
+            task = asyncio.create_task(store_passport_photo(callback.bot, worker.id, callback.from_user.id, passport_photo_path))
+            _store_tasks.add(task)
+            task.add_done_callback(_store_tasks.discard)
         
         readable_approved_status = await sync_to_async(lambda: worker.readable_approved_status)()
         readable_search_status = await sync_to_async(lambda: worker.readable_search_status)()
@@ -13,6 +13,7 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from config import MAX_LEN
+from middlewares.callback_answer import AnswerCallbackMiddleware
 from middlewares.change_username import UpdateUsernameMiddleware
 from middlewares.worker_active_profile import IsActiveProfileMiddleware, IsReviewedByAdminsMiddleware
 from core.models import Worker, Text, Job, WorkerCooperationProposal, EmployerCooperationProposal, WorkerReview, Employer
@@ -28,10 +29,12 @@ router = Router()
 router.callback_query.middleware(UpdateUsernameMiddleware())
 router.message.middleware(UpdateUsernameMiddleware())
 router.callback_query.middleware(IsActiveProfileMiddleware())
+router.callback_query.middleware(AnswerCallbackMiddleware())
 
 cv_router = Router()
 cv_router.callback_query.middleware(UpdateUsernameMiddleware())
 cv_router.callback_query.middleware(IsReviewedByAdminsMiddleware())
+cv_router.callback_query.middleware(AnswerCallbackMiddleware())
 
 
 @router.callback_query(WorkerControlsCallBackFactory.filter(F.control == 'notification'))
@@ -42,6 +45,10 @@ async def handle_notifications_controls(callback: CallbackQuery, callback_data:
             worker.notifications = False
         elif callback_data.action == 'enable':
             worker.notifications = True
+        elif callback_data.action == 'digest':
+            worker.notifications_digest = True
+        elif callback_data.action == 'instant':
+            worker.notifications_digest = False
 
         await sync_to_async(worker.save)()
 
@@ -12,9 +12,13 @@ os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
 from config import BOT_NAME, PER_PAGE
-from core.models import (Button, Area, Worker, Job, Employer, Text,
+from core.models import (Button, Worker, Job, Employer, Text,
                          WorkerCooperationProposal, EmployerCooperationProposal,
-                         WorkerReview, EmployerReview)
+                         WorkerReview, EmployerReview, overlapping_zones)
+from core.catalogue import get_areas, get_button, get_text
+from core.listings import ListingRow, get_listing, listing_row
+from core.job_feed import newer_than
+from core.matcher import suitable_jobs, suitable_workers
 from keyboards.callbacks import (
     AdminControlsCallBackFactory,
 
@@ -107,8 +111,8 @@ async def request_phone_keyboard(language):
 async def zones_keyboard(language, state: FSMContext):
     keyboard = InlineKeyboardBuilder()
 
-    zones = await sync_to_async(lambda: list(Area.objects.all()))()
-    confirm_button = await sync_to_async(Button.objects.get)(slug='confirm')
+    zones = await get_areas()
+    confirm_button = await get_button('confirm')
 
     buttons = []
     state_data = await state.get_data()
@@ -206,6 +210,13 @@ async def worker_profile_keyboard(worker_id):
         if worker.notifications:
             disable_notifications = await sync_to_async(Button.objects.get)(slug='disable_notifications')
             keyboard.row(InlineKeyboardButton(text=disable_notifications.rus, callback_data=WorkerControlsCallBackFactory(control='notification', action='disable').pack()))
+
+            if worker.notifications_digest:
+                digest_disable = await get_button('digest_disable')
+                keyboard.row(InlineKeyboardButton(text=digest_disable.rus, callback_data=WorkerControlsCallBackFactory(control='notification', action='instant').pack()))
+            else:
+                digest_enable = await get_button('digest_enable')
+                keyboard.row(InlineKeyboardButton(text=digest_enable.rus, callback_data=WorkerControlsCallBackFactory(control='notification', action='digest').pack()))
         else:
             enable_notifications = await sync_to_async(Button.objects.get)(slug='enable_notifications')
             keyboard.row(InlineKeyboardButton(text=enable_notifications.rus, callback_data=WorkerControlsCallBackFactory(control='notification', action='enable').pack()))
@@ -258,10 +269,13 @@ async def worker_jobs_menu_keyboard():
 
     all_jobs = await sync_to_async(Button.objects.get)(slug='all_jobs')
     suitable_jobs = await sync_to_async(Button.objects.get)(slug='jobs_suitable')
+    new_jobs = await get_button('jobs_new')
     back = await sync_to_async(Button.objects.get)(slug='back')
 
     keyboard.row(InlineKeyboardButton(text=all_jobs.rus, callback_data=WorkerPagesSectionsCallBackFactory(destination='all-jobs').pack()))
     keyboard.row(InlineKeyboardButton(text=suitable_jobs.rus, callback_data=WorkerPagesSectionsCallBackFactory(destination='suitable-jobs').pack()))
+    # page=0 - вход в ленту из меню, курсор сдвигается только в этом случае
+    keyboard.row(InlineKeyboardButton(text=new_jobs.rus, callback_data=WorkerPagesSectionsCallBackFactory(destination='new-jobs', page=0).pack()))
     keyboard.row(InlineKeyboardButton(text=back.rus, callback_data=WorkerBackCallBackFactory(destination='main').pack()))
 
     return keyboard.as_markup()
@@ -295,26 +309,31 @@ async def worker_reviews_menu_keyboard():
     return keyboard.as_markup()
 
 
-async def worker_jobs_list_keyboard(page, destination, user_id):
+async def worker_jobs_list_keyboard(page, destination, user_id, since=None):
     keyboard = InlineKeyboardBuilder()
 
     jobs = []
 
     if destination == 'all-jobs':
-        jobs = await sync_to_async(lambda: list(Job.objects.filter(
-            Q(is_active=True) & 
-            Q(is_approved=True)
-            ).distinct()))()
-    elif destination == 'suitable-jobs':
+        jobs = await get_listing('jobs')
+    elif destination in ('suitable-jobs', 'new-jobs'):
+        jobs = await suitable_jobs(user_id, since if destination == 'new-jobs' else None)
+
+    # снимок для подбора еще не загружен (или работника в нем нет) - подбор запросом к БД
+    if jobs is None:
         worker = await sync_to_async(Worker.objects.filter(tg_id=user_id).first)()
-        areas = await sync_to_async(lambda: list(worker.areas.all()))()
-        jobs = await sync_to_async(lambda: list(Job.objects.filter(
-            Q(areas__in=areas) &
+        query = (
+            overlapping_zones(worker.zone_mask) &
             Q(is_active=True) & 
             Q(is_approved=True) &
             Q(min_salary__gte=worker.min_salary) &
             Q(permanent_work=worker.permanent_work)
-            ).distinct()))()
+            )
+        # новые с прошлого просмотра - только вакансии, одобренные после курсора (по индексу approved_at, id)
+        if destination == 'new-jobs' and since:
+            query &= newer_than(since)
+
+        jobs = await sync_to_async(lambda: list(Job.objects.filter(query)))()
 
     if jobs:
         jobs_count = len(jobs)
@@ -324,12 +343,13 @@ async def worker_jobs_list_keyboard(page, destination, user_id):
             page = pages_count
 
         jobs = jobs[(page - 1) * PER_PAGE:page * PER_PAGE]
-        salary_hourly = await sync_to_async(Text.objects.get)(slug='salary_hourly')
+        if not isinstance(jobs[0], ListingRow):
+            jobs = await sync_to_async(lambda: [listing_row(job) for job in jobs])()
+        salary_hourly = await get_text('salary_hourly')
 
         for num, job in enumerate(jobs):
-            readable_zones = await sync_to_async(lambda: job.readable_zones)()
             order_num = num + 1 + (PER_PAGE * (page -1))
-            keyboard.row(InlineKeyboardButton(text=f'{order_num}. {job.min_salary} {salary_hourly.rus}: {readable_zones}', callback_data=WorkerDetailsCallBackFactory(object_name='job', object_id=job.id).pack()))
+            keyboard.row(InlineKeyboardButton(text=f'{order_num}. {job.min_salary} {salary_hourly.rus}: {job.zones}', callback_data=WorkerDetailsCallBackFactory(object_name='job', object_id=job.id).pack()))
 
         nav = []
         if pages_count >= 2:
@@ -344,7 +364,7 @@ async def worker_jobs_list_keyboard(page, destination, user_id):
                 nav.append(InlineKeyboardButton(text=f'>>', callback_data=WorkerPagesSectionsCallBackFactory(destination=destination, page=page+1).pack()))
         keyboard.row(*nav)
 
-    back = await sync_to_async(Button.objects.get)(slug='back')
+    back = await get_button('back')
     keyboard.row(InlineKeyboardButton(text=back.rus, callback_data=WorkerMainSectionsCallBackFactory(destination='jobs').pack()))
 
     return keyboard.as_markup()
@@ -388,6 +408,21 @@ async def worker_job_detail_redirect(redirect, job_id):
     return keyboard.as_markup()
 
 
+async def worker_digest_keyboard(jobs):
+    keyboard = InlineKeyboardBuilder()
+    salary_hourly = await get_text('salary_hourly')
+
+    for num, job in enumerate(jobs[:PER_PAGE]):
+        keyboard.row(InlineKeyboardButton(text=f'{num + 1}. {job.min_salary} {salary_hourly.rus}: {job.zones}', callback_data=WorkerRedirectDetailsCallBackFactory(redirect='suitable-jobs', object_name='job', object_id=job.id).pack()))
+
+    # в сводке только первая страница, остальное - в списке подходящих вакансий
+    if len(jobs) > PER_PAGE:
+        suitable_jobs = await get_button('jobs_suitable')
+        keyboard.row(InlineKeyboardButton(text=suitable_jobs.rus, callback_data=WorkerPagesSectionsCallBackFactory(destination='suitable-jobs').pack()))
+
+    return keyboard.as_markup()
+
+
 async def worker_job_detail_back(job_id, proposal_id):
     keyboard = InlineKeyboardBuilder()
 
@@ -701,13 +736,19 @@ async def worker_inbox_review_detail_redirect(review_id):
 #* <------------------------------------------------->
 #! Клавиатуры для работодателей
 #* <------------------------------------------------->
-async def employer_profile_keyboard():
+async def employer_profile_keyboard(digest=False):
     keyboard = InlineKeyboardBuilder()
 
     change_data = await sync_to_async(Button.objects.get)(slug='change_data')
     main_menu = await sync_to_async(Button.objects.get)(slug='main_menu')
 
     keyboard.row(InlineKeyboardButton(text=f'\u202B{change_data.heb}', callback_data=EmployerControlsCallBackFactory(control='data', action='change').pack()))
+    if digest:
+        digest_disable = await get_button('digest_disable')
+        keyboard.row(InlineKeyboardButton(text=f'\u202B{digest_disable.heb}', callback_data=EmployerControlsCallBackFactory(control='digest', action='disable').pack()))
+    else:
+        digest_enable = await get_button('digest_enable')
+        keyboard.row(InlineKeyboardButton(text=f'\u202B{digest_enable.heb}', callback_data=EmployerControlsCallBackFactory(control='digest', action='enable').pack()))
     keyboard.row(InlineKeyboardButton(text=f'\u202B{main_menu.heb}', callback_data=EmployerBackCallBackFactory(destination='main').pack()))
     
     return keyboard.as_markup()
@@ -931,30 +972,30 @@ async def employer_workers_list_keyboard(page, destination, user_id):
     workers = []
 
     if destination == 'workers-all':
-        workers = await sync_to_async(lambda: list(Worker.objects.filter(
-            Q(is_approved=True) & 
-            Q(is_searching=True)
-            ).distinct()))()
+        workers = await get_listing('workers')
     elif destination == 'workers-suitable':
+        workers = await suitable_workers(user_id)
+
+    # снимок для подбора еще не загружен (или работодателя в нем нет) - подбор запросами к БД
+    if workers is None:
         employer = await sync_to_async(Employer.objects.filter(tg_id=user_id).first)()
+        workers = []
         if employer:
-            workers = []
             employer_jobs = await sync_to_async(lambda: list(employer.jobs.filter(
                 Q(is_approved=True) & 
                 Q(is_active=True)
                 ).distinct()))()
 
             for job in employer_jobs:
-                zones = await sync_to_async(lambda: list(job.areas.all()))()
-                suitable_workers = await sync_to_async(lambda: list(Worker.objects.filter(
+                job_workers = await sync_to_async(lambda: list(Worker.objects.filter(
                     Q(is_searching=True) & 
                     Q(is_approved=True) &
                     Q(min_salary__lte=job.min_salary) &
-                    Q(areas__in=zones) &
+                    overlapping_zones(job.zone_mask) &
                     Q(permanent_work=job.permanent_work)
-                    ).distinct()))()
+                    )))()
                 
-                for worker in suitable_workers:
+                for worker in job_workers:
                     if worker not in workers:
                         workers.append(worker)
 
@@ -966,12 +1007,13 @@ async def employer_workers_list_keyboard(page, destination, user_id):
             page = pages_count
 
         workers = workers[(page - 1) * PER_PAGE:page * PER_PAGE]
-        salary_hourly = await sync_to_async(Text.objects.get)(slug='salary_hourly')
+        if not isinstance(workers[0], ListingRow):
+            workers = await sync_to_async(lambda: [listing_row(worker) for worker in workers])()
+        salary_hourly = await get_text('salary_hourly')
 
         for num, worker in enumerate(workers):
-            readable_zones = await sync_to_async(lambda: worker.readable_zones)()
             order_num = num + 1 + (PER_PAGE * (page -1))
-            keyboard.row(InlineKeyboardButton(text=f'\u202B{order_num}. {worker.min_salary} {salary_hourly.heb}: {readable_zones}', callback_data=EmployerDetailsCallBackFactory(object_name='worker', object_id=worker.id).pack()))
+            keyboard.row(InlineKeyboardButton(text=f'\u202B{order_num}. {worker.min_salary} {salary_hourly.heb}: {worker.zones}', callback_data=EmployerDetailsCallBackFactory(object_name='worker', object_id=worker.id).pack()))
 
         nav = []
         if pages_count >= 2:
@@ -986,7 +1028,7 @@ async def employer_workers_list_keyboard(page, destination, user_id):
                 nav.append(InlineKeyboardButton(text=f'>>', callback_data=EmployerPagesSectionsCallBackFactory(destination=destination, page=page+1).pack()))
         keyboard.row(*nav)
 
-    back = await sync_to_async(Button.objects.get)(slug='back')
+    back = await get_button('back')
     keyboard.row(InlineKeyboardButton(text=f'\u202B{back.heb}', callback_data=EmployerMainSectionsCallBackFactory(destination='workers').pack()))
 
     return keyboard.as_markup()
@@ -1041,6 +1083,20 @@ async def employer_worker_detail_redirect(redirect, worker_id):
     return keyboard.as_markup()
 
 
+async def employer_digest_keyboard(workers):
+    keyboard = InlineKeyboardBuilder()
+    salary_hourly = await get_text('salary_hourly')
+
+    for num, worker in enumerate(workers[:PER_PAGE]):
+        keyboard.row(InlineKeyboardButton(text=f'\u202B{num + 1}. {worker.min_salary} {salary_hourly.heb}: {worker.zones}', callback_data=EmployerRedirectDetailsCallBackFactory(redirect='workers-suitable', object_name='worker', object_id=worker.id).pack()))
+
+    if len(workers) > PER_PAGE:
+        workers_suitable = await get_button('workers_suitable')
+        keyboard.row(InlineKeyboardButton(text=f'\u202B{workers_suitable.heb}', callback_data=EmployerPagesSectionsCallBackFactory(destination='workers-suitable').pack()))
+
+    return keyboard.as_markup()
+
+
 async def employer_worker_detail_back(worker_id, proposal_id):
     keyboard = InlineKeyboardBuilder()
 
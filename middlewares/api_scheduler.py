@@ -0,0 +1,118 @@
+import time
+import asyncio
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from prometheus_client import Counter, Gauge, Histogram
+
+from config import API_RATE, API_MIN_RATE, API_BURST, API_INTERACTIVE_RESERVE
+
+
+INTERACTIVE = 'interactive'
+BULK = 'bulk'
+
+# класс запросов текущей задачи: ответы пользователю - interactive, рассылки - bulk
+api_priority: ContextVar[str] = ContextVar('api_priority', default=INTERACTIVE)
+
+API_RETRY_AFTER = Counter('bot_api_retry_after_total', 'Ответы 429 от Bot API', ('priority',))
+API_BULK_WAIT = Histogram('bot_api_bulk_wait_seconds', 'Ожидание очереди массовыми запросами к Bot API')
+API_BULK_RATE = Gauge('bot_api_bulk_rate', 'Текущий темп массовых запросов к Bot API, в секунду')
+
+
+@contextmanager
+def bulk_traffic():
+    """Запросы к Bot API внутри блока идут как массовые (рассылки, посты в каналы)."""
+    token = api_priority.set(BULK)
+    try:
+        yield
+    finally:
+        api_priority.reset(token)
+
+
+class BotAPISchedulerMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: общий темп запросов к Bot API с приоритетом ответов пользователям.
+
+    Все запросы расходуют один token bucket (API_RATE в секунду, до API_BURST подряд).
+    Интерактивные запросы не ждут: они только забирают токены, в том числе в долг.
+    Массовые ждут своей очереди и берут токен, лишь пока в запасе остается
+    API_INTERACTIVE_RESERVE для интерактивных. На 429 массовые запросы встают на паузу
+    retry_after, а их темп снижается вдвое (не ниже API_MIN_RATE) и потом
+    постепенно восстанавливается с каждым успешным запросом.
+    Регистрируется последним, чтобы не учитывать запросы, которые до Bot API не дошли.
+    """
+
+    def __init__(self, rate=API_RATE, min_rate=API_MIN_RATE, burst=API_BURST, reserve=API_INTERACTIVE_RESERVE):
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.rate = rate
+        self.burst = burst
+        self.reserve = min(reserve, burst - 1)
+        self.tokens = burst
+        self.updated_at = time.monotonic()
+        self.paused_until = 0
+        self._bulk_lock = asyncio.Lock()
+        API_BULK_RATE.set(rate)
+
+    def refill(self, now):
+        # интерактивные запросы пополняют bucket с полной скоростью, массовые - со сниженной после 429
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.max_rate)
+        self.updated_at = now
+
+    async def acquire_bulk(self):
+        start = time.monotonic()
+        # asyncio.Lock отдает очередь по порядку, массовые запросы идут друг за другом
+        async with self._bulk_lock:
+            while True:
+                now = time.monotonic()
+                self.refill(now)
+                if now >= self.paused_until and self.tokens >= self.reserve + 1:
+                    self.tokens -= 1
+                    break
+
+                wait = max(self.paused_until - now, (self.reserve + 1 - self.tokens) / self.max_rate)
+                await asyncio.sleep(wait)
+
+            # темп массовых запросов ниже общего, пока не восстановится после 429
+            if self.rate < self.max_rate:
+                self.paused_until = max(self.paused_until, time.monotonic() + 1 / self.rate)
+
+        API_BULK_WAIT.observe(time.monotonic() - start)
+
+    def slow_down(self, retry_after, priority):
+        API_RETRY_AFTER.labels(priority).inc()
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        self.rate = max(self.min_rate, self.rate / 2)
+        API_BULK_RATE.set(self.rate)
+
+    def speed_up(self):
+        if self.rate < self.max_rate:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 100)
+            API_BULK_RATE.set(self.rate)
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        priority = api_priority.get()
+        if priority == BULK:
+            await self.acquire_bulk()
+        else:
+            self.refill(time.monotonic())
+            self.tokens = max(self.tokens - 1, -self.burst)
+
+        try:
+            result = await make_request(bot, method)
+        except TelegramRetryAfter as error:
+            self.slow_down(error.retry_after, priority)
+            raise
+
+        if priority == BULK:
+            self.speed_up()
+
+        return result
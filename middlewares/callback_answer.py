@@ -0,0 +1,43 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import CallbackQuery
+
+
+# ссылки на фоновые задачи, чтобы их не собрал сборщик мусора до завершения
+_answer_tasks = set()
+
+
+async def answer_callback(callback: CallbackQuery):
+    try:
+        await callback.answer()
+    except:
+        pass
+
+
+class AnswerCallbackMiddleware(BaseMiddleware):
+    """Сразу подтверждает колбэк, не дожидаясь, пока хендлер построит ответ.
+
+    Подтверждение уходит параллельно с работой хендлера. Регистрируется после middleware,
+    которые сами отвечают на колбэк с show_alert=True (IsActiveProfileMiddleware).
+    Хендлеры, которые показывают alert, отключают подтверждение флагом
+    flags={'answer_callback': False}.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any],
+        *args,
+        **kwargs
+    ):
+        if get_flag(data, 'answer_callback', default=True):
+            data['callback_answered'] = True
+            task = asyncio.create_task(answer_callback(event))
+            _answer_tasks.add(task)
+            task.add_done_callback(_answer_tasks.discard)
+
+        return await handler(event, data)
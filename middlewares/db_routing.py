@@ -0,0 +1,33 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from config import ADMIN_CHAT_ID, ADMIN_CHAT_REVIEWS_ID, ADMIN_CHAT_PROPOSALS_ID
+from core.routers import current_user
+
+
+# модерация работает с только что созданными анкетами, вакансиями и отзывами, ее чтения - из основной БД
+ADMIN_CHATS = {str(chat_id) for chat_id in (ADMIN_CHAT_ID, ADMIN_CHAT_REVIEWS_ID, ADMIN_CHAT_PROPOSALS_ID) if chat_id}
+
+
+class ReplicaRoutingMiddleware(BaseMiddleware):
+    """Отмечает, чей апдейт обрабатывается: запросы на чтение в нем можно отправить в реплику (core.routers)."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+        *args,
+        **kwargs
+    ):
+        user, chat = data.get('event_from_user'), data.get('event_chat')
+        if user is None or (chat is not None and str(chat.id) in ADMIN_CHATS):
+            return await handler(event, data)
+
+        token = current_user.set(str(user.id))
+        try:
+            return await handler(event, data)
+        finally:
+            current_user.reset(token)
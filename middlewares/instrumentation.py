@@ -0,0 +1,150 @@
+import json
+import time
+import logging
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.methods import TelegramMethod
+from aiogram.types import TelegramObject
+from django.db.backends.signals import connection_created
+from prometheus_client import Counter, Histogram
+
+from config import SLOW_UPDATE_SECONDS
+
+
+logger = logging.getLogger('bot.metrics')
+
+current_metrics: ContextVar['UpdateMetrics'] = ContextVar('current_metrics', default=None)
+
+UPDATE_DURATION = Histogram('bot_update_duration_seconds', 'Время обработки апдейта', ('handler',))
+UPDATE_DB_DURATION = Histogram('bot_update_db_seconds', 'Время запросов к БД за апдейт', ('handler',))
+UPDATE_DB_QUERIES = Histogram('bot_update_db_queries', 'Число запросов к БД за апдейт', ('handler',),
+                              buckets=(1, 2, 5, 10, 20, 30, 50, 100, float('inf')))
+UPDATE_API_CALLS = Histogram('bot_update_api_calls', 'Число запросов к Bot API за апдейт', ('handler',),
+                             buckets=(0, 1, 2, 3, 5, 10, float('inf')))
+SLOW_UPDATES = Counter('bot_slow_updates_total', 'Апдейты дольше порога', ('handler',))
+API_DURATION = Histogram('bot_api_request_duration_seconds', 'Время запроса к Bot API', ('method',))
+
+
+class UpdateMetrics:
+    def __init__(self, event_type):
+        self.event_type = event_type
+        self.router = None
+        self.handler = 'unhandled'
+        self.queries = []
+        self.db_time = 0
+        self.api_calls = 0
+        self.api_time = 0
+        self.finished = False
+
+
+def record_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None or metrics.finished:
+        return execute(sql, params, many, context)
+
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.db_time += time.perf_counter() - start
+        metrics.queries.append(sql)
+
+
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+connection_created.connect(install_query_recorder)
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    """Внешний middleware апдейтов: время обработки, запросы к БД и к Bot API."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+        *args,
+        **kwargs
+    ):
+        metrics = UpdateMetrics(event.event_type)
+        token = current_metrics.set(metrics)
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            duration = time.perf_counter() - start
+            metrics.finished = True
+            current_metrics.reset(token)
+            self.report(metrics, duration)
+
+    def report(self, metrics: UpdateMetrics, duration):
+        UPDATE_DURATION.labels(metrics.handler).observe(duration)
+        UPDATE_DB_DURATION.labels(metrics.handler).observe(metrics.db_time)
+        UPDATE_DB_QUERIES.labels(metrics.handler).observe(len(metrics.queries))
+        UPDATE_API_CALLS.labels(metrics.handler).observe(metrics.api_calls)
+
+        record = {
+            'event': metrics.event_type,
+            'router': metrics.router,
+            'handler': metrics.handler,
+            'duration_ms': round(duration * 1000, 1),
+            'db_ms': round(metrics.db_time * 1000, 1),
+            'queries': len(metrics.queries),
+            'api_calls': metrics.api_calls,
+            'api_ms': round(metrics.api_time * 1000, 1),
+        }
+
+        if duration >= SLOW_UPDATE_SECONDS:
+            SLOW_UPDATES.labels(metrics.handler).inc()
+            record['sql'] = metrics.queries
+            logger.warning(json.dumps(record, ensure_ascii=False))
+        else:
+            logger.info(json.dumps(record, ensure_ascii=False))
+
+
+class HandlerNameMiddleware(BaseMiddleware):
+    """Внутренний middleware: запоминает, какой роутер и хендлер обработал апдейт."""
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+        *args,
+        **kwargs
+    ):
+        metrics = current_metrics.get()
+        handler_object = data.get('handler')
+        if metrics and handler_object:
+            metrics.router = handler_object.callback.__module__
+            metrics.handler = f'{handler_object.callback.__module__}.{handler_object.callback.__name__}'
+
+        return await handler(event, data)
+
+
+class BotAPIMetricsMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: число и время запросов к Bot API."""
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        start = time.perf_counter()
+        try:
+            return await make_request(bot, method)
+        finally:
+            duration = time.perf_counter() - start
+            API_DURATION.labels(type(method).__name__).observe(duration)
+
+            metrics = current_metrics.get()
+            if metrics and not metrics.finished:
+                metrics.api_calls += 1
+                metrics.api_time += duration
@@ -0,0 +1,28 @@
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+from asgiref.sync import sync_to_async
+
+from core.delivery import unreachable_chats, mark_reachable
+
+
+class ReachabilityMiddleware(BaseMiddleware):
+    """Снимает отметку "недоступен" с пользователя, который снова написал боту.
+
+    Проверка идет по закешированному множеству недоступных, поэтому обычные апдейты запросов не делают.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+        *args,
+        **kwargs
+    ):
+        user = data.get('event_from_user')
+        if user is not None and str(user.id) in await unreachable_chats():
+            await sync_to_async(mark_reachable)(user.id)
+
+        return await handler(event, data)
@@ -0,0 +1,95 @@
+import time
+import hashlib
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+from redis.asyncio import Redis
+
+from config import THROTTLE_RATE, THROTTLE_BURST, THROTTLE_DUPLICATE_MS
+
+
+ALLOWED, DUPLICATE, LIMITED = 0, 1, 2
+
+# проверка повторного колбэка и token bucket пользователя за один запрос к redis
+THROTTLE_SCRIPT = '''
+if #KEYS > 1 then
+    if not redis.call('SET', KEYS[2], 1, 'NX', 'PX', ARGV[4]) then
+        return 1
+    end
+end
+
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local now = tonumber(ARGV[3])
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(bucket[1]) or burst
+local ts = tonumber(bucket[2]) or now
+
+tokens = math.min(burst, tokens + math.max(0, now - ts) / 1000 * rate)
+local result = 2
+if tokens >= 1 then
+    tokens = tokens - 1
+    result = 0
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('PEXPIRE', KEYS[1], math.ceil(burst / rate * 1000))
+return result
+'''
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """Внешний middleware сообщений и колбэков: ограничивает частоту апдейтов от одного пользователя.
+
+    У каждого пользователя в redis лежит token bucket (THROTTLE_RATE апдейтов в секунду,
+    не больше THROTTLE_BURST подряд). Одинаковые колбэки с одного сообщения чаще, чем раз
+    в THROTTLE_DUPLICATE_MS, схлопываются в один. Лишние апдейты отбрасываются до хендлеров,
+    колбэки при этом подтверждаются, чтобы не висели часики.
+    Redis берется из data['redis'], без него middleware ничего не делает.
+    """
+
+    def __init__(self):
+        self._scripts = {}
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+        *args,
+        **kwargs
+    ):
+        redis: Redis = data.get('redis')
+        user = data.get('event_from_user')
+        if redis is None or user is None:
+            return await handler(event, data)
+
+        keys = [f'throttle:{user.id}']
+        if isinstance(event, CallbackQuery) and THROTTLE_DUPLICATE_MS:
+            message_id = event.message.message_id if event.message else event.inline_message_id
+            callback_hash = hashlib.sha1(f'{message_id}:{event.data}'.encode()).hexdigest()
+            keys.append(f'throttle:callback:{user.id}:{callback_hash}')
+
+        result = await self.script(redis)(
+            keys=keys,
+            args=[THROTTLE_RATE, THROTTLE_BURST, int(time.time() * 1000), THROTTLE_DUPLICATE_MS],
+        )
+
+        if int(result) == ALLOWED:
+            return await handler(event, data)
+
+        if isinstance(event, CallbackQuery):
+            try:
+                await event.answer()
+            except:
+                pass
+
+        return True
+
+    def script(self, redis: Redis):
+        # скрипт регистрируется на каждом клиенте redis отдельно
+        if id(redis) not in self._scripts:
+            self._scripts[id(redis)] = redis.register_script(THROTTLE_SCRIPT)
+        return self._scripts[id(redis)]
@@ -0,0 +1,171 @@
+import json
+import hashlib
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware, Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware, NextRequestMiddlewareType
+from aiogram.exceptions import TelegramBadRequest
+from aiogram.methods import (TelegramMethod, SendMessage, SendPhoto, EditMessageText,
+                             EditMessageCaption, EditMessageReplyMarkup, DeleteMessage)
+from aiogram.enums import ChatType
+from aiogram.types import CallbackQuery, Message, InlineKeyboardMarkup
+from redis.asyncio import Redis
+
+from config import EDIT_HASH_TTL, RENDER_SKIP_SECONDS
+from middlewares.api_scheduler import api_priority, BULK
+
+
+NOT_MODIFIED = 'Bad Request: message is not modified: specified new message content and reply markup are exactly the same as a current content and reply markup of the message'
+
+# сообщения, которые текущий хендлер пытался отредактировать
+edited_messages: ContextVar[set] = ContextVar('edited_messages', default=None)
+
+
+def digest(*parts):
+    return hashlib.sha1(json.dumps(parts, ensure_ascii=False, default=str).encode()).hexdigest()
+
+
+def markup_digest(markup):
+    if markup is None:
+        return digest(None)
+    return digest(markup.model_dump(mode='json', exclude_none=True))
+
+
+def content_key(chat_id, message_id):
+    return f'edits:content:{chat_id}:{message_id}'
+
+
+def render_key(chat_id, message_id):
+    return f'edits:render:{chat_id}:{message_id}'
+
+
+class SkipUnchangedEditMiddleware(BaseRequestMiddleware):
+    """Middleware сессии бота: не отправляет в Bot API правки, которые не меняют сообщение.
+
+    Для каждого сообщения в redis хранится хэш текста и клавиатуры последней отправки/правки.
+    Если правка совпадает с ним, сразу выбрасывается та же ошибка "message is not modified",
+    которую вернул бы телеграм.
+    Из новых сообщений запоминаются только те, что потом правятся: ответы в личном чате
+    с inline-клавиатурой. Рассылки и посты в каналы не запоминаются.
+    """
+
+    def __init__(self, redis: Redis):
+        self.redis = redis
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType,
+        bot: Bot,
+        method: TelegramMethod,
+    ):
+        if isinstance(method, (SendMessage, SendPhoto)):
+            result = await make_request(bot, method)
+            if self.editable(method, result):
+                await self.remember(method, result.chat.id, result.message_id)
+            return result
+
+        if isinstance(method, DeleteMessage):
+            await self.redis.delete(content_key(method.chat_id, method.message_id), render_key(method.chat_id, method.message_id))
+            return await make_request(bot, method)
+
+        if not isinstance(method, (EditMessageText, EditMessageCaption, EditMessageReplyMarkup)) or method.inline_message_id:
+            return await make_request(bot, method)
+
+        attempted = edited_messages.get()
+        if attempted is not None:
+            attempted.add((str(method.chat_id), method.message_id))
+
+        key = content_key(method.chat_id, method.message_id)
+        fields = self.fields(method)
+        stored = dict(zip(fields, await self.redis.hmget(key, *fields)))
+        if stored == fields:
+            raise TelegramBadRequest(method=method, message=NOT_MODIFIED)
+
+        try:
+            result = await make_request(bot, method)
+        except TelegramBadRequest as error:
+            if 'message is not modified' in error.message:
+                await self.remember(method, method.chat_id, method.message_id)
+            raise
+
+        # сообщение изменилось, сохраненный отпечаток отрисовки к нему больше не относится
+        await self.redis.delete(render_key(method.chat_id, method.message_id))
+        await self.remember(method, method.chat_id, method.message_id)
+        return result
+
+    @staticmethod
+    def editable(method, result):
+        return (
+            api_priority.get() != BULK
+            and result.chat.type == ChatType.PRIVATE
+            and isinstance(method.reply_markup, InlineKeyboardMarkup)
+        )
+
+    @staticmethod
+    def fields(method):
+        fields = {'markup': markup_digest(method.reply_markup)}
+        if isinstance(method, (SendMessage, EditMessageText)):
+            fields['text'] = digest(method.text, method.parse_mode, method.entities)
+        elif isinstance(method, (SendPhoto, EditMessageCaption)):
+            fields['text'] = digest(method.caption, method.parse_mode, method.caption_entities)
+
+        return fields
+
+    async def remember(self, method, chat_id, message_id):
+        key = content_key(chat_id, message_id)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=self.fields(method))
+            pipe.expire(key, EDIT_HASH_TTL)
+            await pipe.execute()
+
+
+class SkipUnchangedRenderMiddleware(BaseMiddleware):
+    """Внутренний middleware для экранов только на чтение (списки, карточки).
+
+    Повторное нажатие той же кнопки на том же сообщении при том же состоянии FSM
+    не перерисовывает экран в течение RENDER_SKIP_SECONDS: колбэк только подтверждается.
+    Работает вместе с SkipUnchangedEditMiddleware, который сбрасывает отпечаток при изменении сообщения.
+    Redis берется из data['redis'], без него middleware ничего не делает.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[CallbackQuery, Dict[str, Any]], Awaitable[Any]],
+        event: CallbackQuery,
+        data: Dict[str, Any],
+        *args,
+        **kwargs
+    ):
+        redis: Redis = data.get('redis')
+        state = data.get('state')
+        if redis is None or state is None or not isinstance(event.message, Message):
+            return await handler(event, data)
+
+        chat_id, message_id = event.message.chat.id, event.message.message_id
+        key = render_key(chat_id, message_id)
+        if await redis.get(key) == await self.fingerprint(event, state):
+            if not data.get('callback_answered'):
+                try:
+                    await event.answer()
+                except:
+                    pass
+            return True
+
+        attempted = set()
+        token = edited_messages.set(attempted)
+        try:
+            result = await handler(event, data)
+        finally:
+            edited_messages.reset(token)
+
+        # запоминаются только экраны, которые перерисовали это же сообщение,
+        # а не отправили новое
+        if (str(chat_id), message_id) in attempted:
+            await redis.set(key, await self.fingerprint(event, state), ex=RENDER_SKIP_SECONDS)
+
+        return result
+
+    @staticmethod
+    async def fingerprint(event: CallbackQuery, state):
+        return digest(event.data, await state.get_state(), await state.get_data())
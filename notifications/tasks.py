@@ -1,11 +1,14 @@
 import datetime
 import json
 import time
+import logging
 
+from django.db import transaction
 from django.db.models import Q
 from celery import shared_task
 
 from core.models import TGUser
+from core.delivery import classify_failure, mark_unreachable, PERMANENT_FAILURES
 from notifications.models import Notification
 from notifications.utils import send_message_on_telegram
 
@@ -14,7 +17,7 @@ def search_notifications():
     return Notification.objects.filter(
         Q(notify_time__lte=datetime.datetime.utcnow()) & 
         Q(is_valid=True) &
-        Q(started=False)).select_related('image').all()
+        Q(started=False)).all()
     
 
 def check_notification(notification: Notification):
@@ -27,30 +30,37 @@ def check_notification(notification: Notification):
     return is_valid
     
 
-def mark_notifications_started(notifications):
-    valid_notifications = []
-    for notification in notifications:
-        is_valid = check_notification(notification)
-        if is_valid:
-            notification.started = True
-            valid_notifications.append(notification)
-        else:
-            notification.is_valid = False
-        
-        notification.save()
+def claim_notifications():
+    """Атомарно захватывает готовые рассылки, чтобы параллельные запуски задачи не отправили одну рассылку дважды."""
+    valid_ids = []
+    invalid_ids = []
+    with transaction.atomic():
+        notifications = search_notifications().select_for_update(skip_locked=True).prefetch_related('buttons')
+        for notification in notifications:
+            if check_notification(notification):
+                valid_ids.append(notification.id)
+            else:
+                invalid_ids.append(notification.id)
+
+        if invalid_ids:
+            Notification.objects.filter(id__in=invalid_ids).update(is_valid=False)
+
+        if valid_ids:
+            Notification.objects.filter(Q(id__in=valid_ids) & Q(started=False)).update(started=True)
 
-    return valid_notifications
+    return list(Notification.objects.filter(id__in=valid_ids).select_related('image').prefetch_related('buttons'))
 
 
 def select_users_for_notification(notification: Notification):
+    # недоступные пользователи (заблокировали бота, удалены) в рассылку не попадают
     if notification.target == '1':
-        users = [notification.user]
+        users = [notification.user] if notification.user.unreachable_since is None else []
     elif notification.target == '2':
-        users = TGUser.objects.filter(target='1').all()
+        users = TGUser.objects.filter(target='1', unreachable_since__isnull=True).all()
     elif notification.target == '3':
-        users = TGUser.objects.filter(target='2').all()
+        users = TGUser.objects.filter(target='2', unreachable_since__isnull=True).all()
     elif notification.target == '4':
-        users = TGUser.objects.all()
+        users = TGUser.objects.filter(unreachable_since__isnull=True).all()
     
     return users
 
@@ -107,8 +117,7 @@ def construct_notification_params(notification: Notification):
 
 @shared_task
 def send_notifications():
-    notifications = search_notifications()
-    valid_notifications = mark_notifications_started(notifications)
+    valid_notifications = claim_notifications()
 
     for notification in valid_notifications:
         users = select_users_for_notification(notification)
@@ -140,11 +149,14 @@ def send_notifications():
             notification.total_send_users += 1
             if response:
                 try:
-                    if response.json().get('ok'):
+                    response_json = response.json()
+                    if response_json.get('ok'):
                         success = True
                         notification.success_users += 1
-                except:
-                    pass
+                    elif classify_failure(response_json.get('error_code'), response_json.get('description')) in PERMANENT_FAILURES:
+                        mark_unreachable(user.tg_id)
+                except ValueError:
+                    logging.exception('Telegram response parsing failed for %s', user.tg_id)
             
             notification.save()
             time.sleep(3)
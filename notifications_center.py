@@ -1,24 +1,32 @@
 import os
 import asyncio
+import logging
+from collections import defaultdict
 
 import django
 from django.db.models import Q
 from aiogram import Bot
+from redis.asyncio import Redis
 from asgiref.sync import sync_to_async
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'work_exchange.settings')
 django.setup()
 
-from config import ADMIN_CHAT_PROPOSALS_ID, ADMIN_CHAT_REVIEWS_ID
+from config import ADMIN_CHAT_PROPOSALS_ID, ADMIN_CHAT_REVIEWS_ID, DIGEST_INTERVAL, DIGEST_BATCH
 from core.models import (Text, Worker, ChannelForEmployers, ChannelForWorkers, 
                          Employer, Job, WorkerCooperationProposal, EmployerCooperationProposal,
-                         EmployerReview, WorkerReview)
+                         EmployerReview, WorkerReview, overlapping_zones)
+from channel_posting import ChannelPost, poster
+from core import digest
+from core.delivery import deliver, reachable, unreachable_chats, TRANSIENT_FAILURES
+from core.listings import listing_row
+from core.matcher import workers_for_job
 from keyboards import keyboards
 from utils import escape_markdown
 
 
 async def new_worker_to_employers_channels(bot: Bot, worker: Worker, about_heb: str):
-    target_channels = await sync_to_async(lambda: list(ChannelForEmployers.objects.all()))()
+    target_channels = await sync_to_async(lambda: list(ChannelForEmployers.objects.filter(is_active=True).values_list('tg_id', flat=True)))()
     readable_zones = await sync_to_async(lambda: worker.readable_zones)()
     readable_work_type = await sync_to_async(lambda: worker.readable_work_type_heb)()
 
@@ -36,22 +44,17 @@ async def new_worker_to_employers_channels(bot: Bot, worker: Worker, about_heb:
             \n*{work_type_text.heb}* {readable_work_type}\
             \n*{about_text.heb}* {about_heb}'''
 
-    for channel in target_channels:
-        try:
-            await bot.send_photo(
-                chat_id=channel.tg_id,
-                photo=worker.selfie,
-                caption=reply_text,
-                reply_markup=await keyboards.more_workers_channel_keyboard(),
-                parse_mode='Markdown',
-            )
-        except:
-            pass
-        await asyncio.sleep(10)
+    # пост собирается один раз, дальше его публикуют очереди каналов
+    post = ChannelPost(
+        text=reply_text,
+        photo=worker.selfie,
+        reply_markup=await keyboards.more_workers_channel_keyboard(),
+    )
+    poster.publish(bot, target_channels, post)
 
 
 async def new_jobs_to_workers_channels(bot: Bot, job: Job):
-    target_channels = await sync_to_async(lambda: list(ChannelForWorkers.objects.all()))()
+    target_channels = await sync_to_async(lambda: list(ChannelForWorkers.objects.filter(is_active=True).values_list('tg_id', flat=True)))()
 
     readable_zones = await sync_to_async(lambda: job.readable_zones)()
     readable_work_type = await sync_to_async(lambda: job.readable_work_type_rus)()
@@ -72,29 +75,30 @@ async def new_jobs_to_workers_channels(bot: Bot, job: Job):
             \n*{description_text.rus}* {job.description_rus}\
             '''
 
-    for channel in target_channels:        
-        try:
-            await bot.send_message(
-                chat_id=channel.tg_id,
-                text=reply_text,
-                reply_markup=await keyboards.more_jobs_channel_keyboard(),
-                parse_mode='Markdown',
-            )
-        except:
-            pass
-        await asyncio.sleep(10)
+    post = ChannelPost(
+        text=reply_text,
+        reply_markup=await keyboards.more_jobs_channel_keyboard(),
+    )
+    poster.publish(bot, target_channels, post)
 
 
-async def new_worker_to_employers(bot: Bot, worker: Worker, about_heb: str):
-    worker_zones = await sync_to_async(lambda: list(worker.areas.all()))()
-    employers = await sync_to_async(lambda: list(Employer.objects.filter(
-        Q(jobs__areas__in=worker_zones) &
-        Q(jobs__min_salary__gte=worker.min_salary) &
-        Q(jobs__notifications=True) &
-        Q(jobs__is_approved=True) &
-        Q(jobs__is_active=True) &
-        Q(jobs__permanent_work=worker.permanent_work)
-        ).distinct()))()
+async def new_worker_to_employers(bot: Bot, worker: Worker, about_heb: str, redis: Redis = None):
+    jobs = Job.objects.filter(
+        overlapping_zones(worker.zone_mask) &
+        Q(min_salary__gte=worker.min_salary) &
+        Q(notifications=True) &
+        Q(is_approved=True) &
+        Q(is_active=True) &
+        Q(permanent_work=worker.permanent_work)
+        )
+    employers = await sync_to_async(lambda: list(Employer.objects.filter(id__in=jobs.values('employer_id'))))()
+    unreachable = await unreachable_chats()
+    employers = [employer for employer in employers if employer.tg_id not in unreachable]
+
+    # без redis копить сводки негде - тогда все получают уведомление сразу
+    if redis is not None:
+        await digest.enqueue(redis, 'workers', [employer.tg_id for employer in employers if employer.notifications_digest], worker.id)
+        employers = [employer for employer in employers if not employer.notifications_digest]
 
     readable_zones = await sync_to_async(lambda: worker.readable_zones)()
     readable_work_type = await sync_to_async(lambda: worker.readable_work_type_heb)()
@@ -113,29 +117,49 @@ async def new_worker_to_employers(bot: Bot, worker: Worker, about_heb: str):
             \n*{work_type_text.heb}* {readable_work_type}\
             \n*{about_text.heb}* {about_heb}'''
     
+    keyboard = await keyboards.employer_worker_detail_redirect('workers-suitable', worker.id)
     for employer in employers:
-        try:
-            await bot.send_message(
-                chat_id=employer.tg_id,
-                text=reply_text,
-                reply_markup=await keyboards.employer_worker_detail_redirect('workers-suitable', worker.id),
-                parse_mode='Markdown',
-            )
-        except:
-            pass
+        await deliver(bot.send_message, employer.tg_id, text=reply_text, reply_markup=keyboard, parse_mode='Markdown')
         await asyncio.sleep(3)
 
 
-async def new_job_to_workers(bot: Bot, job: Job):
-    job_zones = await sync_to_async(lambda: list(job.areas.all()))()
+async def job_recipients(job: Job):
+    """tg_id работников с уведомлениями для вакансии: (получающие сразу, получающие сводкой)."""
+    instant_tg_ids = await workers_for_job(job, notifications=True, digest=False)
+    digest_tg_ids = await workers_for_job(job, notifications=True, digest=True)
+    if instant_tg_ids is not None and digest_tg_ids is not None:
+        # снимок может на несколько секунд отставать от правок из админки:
+        # флаги получателей сверяются с БД одним запросом
+        tg_ids = instant_tg_ids + digest_tg_ids
+        current = await sync_to_async(lambda: dict(Worker.objects.filter(
+            tg_id__in=tg_ids, notifications=True, is_approved=True, is_searching=True,
+            ).values_list('tg_id', 'notifications_digest')))()
+        tg_ids = await reachable([tg_id for tg_id in tg_ids if tg_id in current])
+        return [tg_id for tg_id in tg_ids if not current[tg_id]], [tg_id for tg_id in tg_ids if current[tg_id]]
+
     workers = await sync_to_async(lambda: list(Worker.objects.filter(
-        Q(areas__in=job_zones) &
+        overlapping_zones(job.zone_mask) &
         Q(min_salary__lte=job.min_salary) &
         Q(notifications=True) &
         Q(is_approved=True) &
         Q(is_searching=True) &
         Q(permanent_work=job.permanent_work)
-        ).distinct()))()
+        ).values_list('tg_id', 'notifications_digest')))()
+
+    unreachable = await unreachable_chats()
+    workers = [(tg_id, is_digest) for tg_id, is_digest in workers if tg_id not in unreachable]
+
+    return [tg_id for tg_id, is_digest in workers if not is_digest], [tg_id for tg_id, is_digest in workers if is_digest]
+
+
+async def new_job_to_workers(bot: Bot, job: Job, redis: Redis = None):
+    workers_tg_ids, digest_tg_ids = await job_recipients(job)
+
+    # без redis копить сводки негде - тогда все получают уведомление сразу
+    if redis is not None:
+        await digest.enqueue(redis, 'jobs', digest_tg_ids, job.id)
+    else:
+        workers_tg_ids += digest_tg_ids
 
     readable_zones = await sync_to_async(lambda: job.readable_zones)()
     readable_work_type = await sync_to_async(lambda: job.readable_work_type_rus)()
@@ -156,19 +180,76 @@ async def new_job_to_workers(bot: Bot, job: Job):
             \n*{description_text.rus}* {job.description_rus}\
             '''
     
-    for worker in workers:
-        try:
-            await bot.send_message(
-                chat_id=worker.tg_id,
-                text=reply_text,
-                reply_markup=await keyboards.worker_job_detail_redirect('suitable-jobs', job.id),
-                parse_mode='Markdown',
-            )
-        except:
-            pass
+    keyboard = await keyboards.worker_job_detail_redirect('suitable-jobs', job.id)
+    for worker_tg_id in workers_tg_ids:
+        await deliver(bot.send_message, worker_tg_id, text=reply_text, reply_markup=keyboard, parse_mode='Markdown')
         await asyncio.sleep(3)
 
 
+async def send_digest(bot: Bot, redis: Redis, kind, queryset, reply_text, digest_keyboard):
+    # сводки, которые не ушли из-за временной ошибки (429, сеть) или прерванной рассылки, возвращаются
+    # в очередь и уходят со следующей рассылкой; после остальных ошибок сводка отбрасывается
+    unsent = defaultdict(set)
+    try:
+        # объекты всей пачки получателей достаются одним запросом
+        while batch := await digest.pop_batch(redis, kind, DIGEST_BATCH):
+            for tg_id, object_ids in batch.items():
+                unsent[tg_id].update(object_ids)
+
+            unreachable = await unreachable_chats()
+            object_ids = {object_id for object_ids in batch.values() for object_id in object_ids}
+            objects = await sync_to_async(lambda: queryset.filter(id__in=object_ids).in_bulk())()
+
+            for tg_id, object_ids in batch.items():
+                # объекты, снятые с публикации после попадания в сводку, не показываются
+                rows = [listing_row(objects[object_id]) for object_id in object_ids if object_id in objects]
+                if rows and tg_id not in unreachable:
+                    failure = await deliver(bot.send_message, tg_id, text=reply_text, reply_markup=await digest_keyboard(rows), parse_mode='Markdown')
+                    await asyncio.sleep(3)
+                    if failure in TRANSIENT_FAILURES:
+                        continue
+                    if failure is not None:
+                        logging.warning('Digest for %s dropped: %s', tg_id, failure)
+
+                unsent[tg_id].difference_update(object_ids)
+    finally:
+        await digest.requeue(redis, kind, {tg_id: object_ids for tg_id, object_ids in unsent.items() if object_ids})
+
+
+async def send_digests(bot: Bot, redis: Redis):
+    digest_jobs = await sync_to_async(Text.objects.get)(slug='digest_jobs')
+    digest_workers = await sync_to_async(Text.objects.get)(slug='digest_workers')
+
+    await send_digest(
+        bot, redis, 'jobs',
+        Job.objects.filter(is_active=True, is_approved=True),
+        f'*{digest_jobs.rus}*',
+        keyboards.worker_digest_keyboard,
+    )
+    await send_digest(
+        bot, redis, 'workers',
+        Worker.objects.filter(is_approved=True, is_searching=True),
+        f'\u202B*{digest_workers.heb}*',
+        keyboards.employer_digest_keyboard,
+    )
+
+
+async def digest_loop(bot: Bot, redis: Redis):
+    """Раз в DIGEST_INTERVAL рассылает накопленные сводки.
+
+    Ключ с TTL отмечает последнюю рассылку, поэтому перезапуск бота или второй процесс
+    не отправляют сводки чаще интервала.
+    """
+    while True:
+        try:
+            if await redis.set('digest:sent', 1, nx=True, ex=DIGEST_INTERVAL):
+                await send_digests(bot, redis)
+        except Exception:
+            logging.exception('Digest sending failed')
+
+        await asyncio.sleep(60)
+
+
 async def worker_proposal_accepted(bot: Bot, proposal_id):
     proposal = await sync_to_async(WorkerCooperationProposal.objects.filter(id=proposal_id).first)()
     if proposal:
@@ -11,13 +11,19 @@ https://docs.djangoproject.com/en/4.2/ref/settings/
 """
 
 import os
+import sys
 from pathlib import Path
 
-import pymysql 
 from dotenv import load_dotenv
 
+try:
+    # mysqlclient (драйвер на C), если установлен, иначе pymysql
+    import MySQLdb
+except ImportError:
+    import pymysql
+    pymysql.install_as_MySQLdb()
+
 
-pymysql.install_as_MySQLdb()
 load_dotenv()
 
 
@@ -108,9 +114,25 @@ DATABASES = {
         'OPTIONS': {
             'charset': 'utf8mb4',
         },
+        # соединения переиспользуются (в боте, celery и админке), перед повторным использованием
+        # проверяются ping'ом; бот проверяет их сам по таймеру (core/db.py)
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 600)),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# реплика для чтений бота (core/routers.py), пользователь и пароль - как у основной БД;
+# в тестах (manage.py test) - зеркало основной БД, чтобы проверять роутер
+if os.getenv('DB_REPLICA_HOST') or sys.argv[1:2] == ['test']:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': os.getenv('DB_REPLICA_HOST', DATABASES['default']['HOST']),
+        'PORT': os.getenv('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -152,6 +174,9 @@ STATIC_ROOT = os.path.join(BASE_DIR, 'static')
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# временная папка для скачанных из телеграма фото паспортов (до сохранения в filer)
+PASSPORT_UPLOAD_DIR = os.path.join(MEDIA_ROOT, 'uploads')
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 